@@ -0,0 +1,381 @@
+import random
+from collections import deque
+from itertools import islice
+
+from snake_sim import BODY, DIRECTIONS, HURDLE, OPPOSITE
+
+# Autopilot for SnakeSim. Cells are flat indices (row * cols + col).
+#
+# Searches are time-aware: a body segment k cells behind the head is gone
+# after len(snake) - k ticks, so a cell reached at distance d is passable once
+# d reaches that count. k comes from the move on which the sim recorded each
+# body cell being entered, so nothing has to be marked per search. A planned
+# path therefore stays valid for as long as nothing unexpected happens, and is
+# followed without searching again until the food moves, the next step turns
+# out to be blocked or the path runs out.
+# Search buffers are reused between plans and invalidated by bumping a stamp
+# rather than being cleared.
+#
+# Each decide() may spend at most SEARCH_BUDGET search steps, so no tick costs
+# more than that however big the board is. A plan that needs more is spread over
+# the next ticks: the snake steps along the most promising part found so far
+# if it can still get back to its tail from there, and otherwise keeps
+# heading for its tail until the next try. The last route found back to the
+# tail is kept, so a tick whose searches all run out can still follow it.
+
+# Ticks to follow the tail before checking whether the food became safe to reach
+STALL_TICKS = 4
+# Search steps (a cell taken off or put on the open set) per decide(), about
+# 0.7 ms on any board size, and the part of them a food search can't use so
+# there is always enough left to look for the tail
+SEARCH_BUDGET = 800
+STALL_RESERVE = 300
+# Cells counted per opening when nothing leads back to the tail
+ROOMIEST_CAP = 48
+
+def neighbor_cells(cell, cols, rows):
+    x, y = cell % cols, cell // cols
+    return tuple((y + dy) * cols + x + dx for dx, dy in DIRECTIONS.values()
+                 if 0 <= x + dx < cols and 0 <= y + dy < rows)
+
+class Autopilot:
+    def __init__(self):
+        self.size = None
+        self.path = []  # planned cells, next step last
+        self.partial = []  # best part of the last plan that ran out of budget
+        self.escape = []  # last route found back to the tail, next step last
+        self.escape_from = None
+        self.escape_length = 0
+        self.target = None
+        self.expect = None
+        self.wait = -1
+        self.budget = 0
+        self.stamp = 0
+        self.seen = []
+        self.parent = []
+        self.depth = []
+
+    def reset(self):
+        self.path = []
+        self.expect = None
+        self.escape = []
+
+    def _allocate(self, cols, rows):
+        cells = cols * rows
+        self.size = (cols, rows)
+        self.seen = [0] * cells
+        self.parent = [-1] * cells
+        self.depth = [0] * cells
+        self.stamp = 0
+        self.path = []
+        self.escape = []
+
+    def decide(self, sim):
+        # Direction to steer for the next tick
+        cols, rows = sim.cols, sim.rows
+        if self.size != (cols, rows):
+            self._allocate(cols, rows)
+        hx, hy = sim.snake[0]
+        head = hy * cols + hx
+        food = sim.food[1] * cols + sim.food[0] if sim.food else -1
+        self.wait -= 1
+        self.budget = SEARCH_BUDGET
+        if head != self.expect or food != self.target or not self.path or sim.grid[self.path[-1]]:
+            if self.wait > 0 and head == self.expect and food == self.target:
+                self._stall(sim, head)
+            else:
+                self._plan(sim, head, food)
+        if not self.path:
+            self.expect = None
+            return sim.direction
+        cell = self.path.pop()
+        self.expect = cell
+        x, y = cell % cols, cell // cols
+        if x != hx:
+            return "RIGHT" if x > hx else "LEFT"
+        return "DOWN" if y > hy else "UP"
+
+    # ---------------- PLANNING ----------------
+    def _plan(self, sim, head, food):
+        # A path planned for food that has since moved still leads somewhere
+        # the tail can be reached from, so it is kept if nothing better is found.
+        # Should the food have moved onto it, the snake grows early, which only
+        # matters if some later cell relies on the tail moving away in time
+        kept = self.path
+        if head != self.expect or not kept or sim.grid[kept[-1]]:
+            kept = None
+        elif food in kept and any(sim.grid[cell] for cell in kept[:kept.index(food)]):
+            kept = None
+        self.target = food
+        # Part of the budget is kept back for finding a way to the tail or
+        # checking a step toward the food. With a route to the tail in hand,
+        # checking a path that was found may use it too
+        escape = self._escape_step(sim, head)
+        reserve = STALL_RESERVE
+        self.budget -= reserve
+        self.partial = []
+        path = self._seek(sim, head, food) if food >= 0 else None
+        if path and escape is not None:
+            self.budget += reserve
+            reserve = 0
+        if path and self._tail_reachable(sim, path):
+            self.budget += reserve
+            self.path = path
+            return
+        if path and self.budget <= 0:
+            # Found, but not yet whether eating it is safe: go partway
+            self.partial = path[1:]
+        self.budget += reserve
+        if kept:
+            self.path = kept
+            return
+        if self.partial and self._escape_from(sim, self.partial[-1]):
+            # Out of budget: one step closer, then plan again on the next tick
+            self.path = self.partial[-1:]
+            return
+        # Food is out of reach, would trap the snake or needs more than the
+        # budget and no step toward it is known to be safe: stall for a few ticks
+        self.wait = STALL_TICKS
+        if escape is not None and self.budget <= 0:
+            self.path = [self._take_escape()]
+        else:
+            self._stall(sim, head)
+
+    def _stall(self, sim, head):
+        # One step along the longest way back to the tail, or failing that into the roomiest opening
+        self.path = self._follow_tail(sim, head) or self._roomiest(sim, head)
+
+    def _escape_step(self, sim, head):
+        # Next cell of the kept route back to the tail, if it still holds
+        if self.escape and self.escape_from == head and self.escape_length == len(sim.snake):
+            cell = self.escape[-1]
+            if not sim.grid[cell]:
+                return cell
+        return None
+
+    def _take_escape(self):
+        cell = self.escape_from = self.escape.pop()
+        return cell
+
+    def _escape_from(self, sim, cell):
+        # Whether the tail can be reached after stepping into cell; the route is kept
+        x, y = sim.snake[-1]
+        path = self._seek(sim, cell, y * sim.cols + x, 1)
+        if path is None:
+            return False
+        self.escape = path
+        self.escape_from = cell
+        self.escape_length = len(sim.snake)
+        return True
+
+    def _seek(self, sim, start, goal, dist=0, length=None, moves=None):
+        # Time-aware A* on Manhattan distance from start, reached after dist ticks,
+        # to goal. A step changes the estimate by 0 or 2, so the open set is just
+        # two stacks: cells as promising as the current one and those 2 worse.
+        # Taking the latest first follows one line toward the goal, so open boards
+        # cost about the path length rather than its area. Cells come goal-first
+        # with start left out; None if there is no path or the budget ran out
+        # first, in which case partial holds the way to the closest cell reached.
+        # length and moves stand in for the sim's when the snake is imagined elsewhere.
+        self.stamp += 1
+        stamp = self.stamp
+        cols = sim.cols
+        grid = sim.grid
+        seen = self.seen
+        parent = self.parent
+        depth = self.depth
+        entered = sim.entered
+        last = len(grid) - cols
+        right = cols - 1
+        # Segment k (head = 0) is in the cell entered on move moves - k and may be
+        # entered from tick length - k + 1 on: the tail only leaves after the
+        # collision check of the tick it moves
+        base = (len(sim.snake) if length is None else length) + 1 - (sim.moves if moves is None else moves)
+        budget = self.budget
+        gx, gy = goal % cols, goal // cols
+        seen[start] = stamp
+        depth[start] = dist
+        closest = abs(start % cols - gx) + abs(start // cols - gy)
+        closest_cell = start
+        now = [start]
+        later = []
+        while budget > 0:
+            if not now:
+                if not later:
+                    break
+                now, later = later, now
+            budget -= 1
+            cell = now.pop()
+            g = depth[cell] + 1
+            x = cell % cols
+            h_cell = abs(x - gx) + abs(cell // cols - gy)
+            # Neighbours are worked out in place, with -1 for those off the board:
+            # a table of them costs more to fill than a whole search on big boards
+            for n in (cell - cols if cell >= cols else -1, cell + cols if cell < last else -1,
+                      cell - 1 if x else -1, cell + 1 if x < right else -1):
+                if n < 0 or seen[n] == stamp:
+                    continue
+                flags = grid[n]
+                if flags and (flags & HURDLE or entered[n] + base > g):
+                    continue
+                seen[n] = stamp
+                parent[n] = cell
+                depth[n] = g
+                budget -= 1
+                if n == goal:
+                    self.budget = budget
+                    path = []
+                    while n != start:
+                        path.append(n)
+                        n = parent[n]
+                    return path
+                h = abs(n % cols - gx) + abs(n // cols - gy)
+                if h < h_cell:
+                    now.append(n)
+                    if h < closest:
+                        closest = h
+                        closest_cell = n
+                else:
+                    later.append(n)
+        self.budget = budget
+        if budget <= 0:
+            n = closest_cell
+            self.partial = []
+            while n != start:
+                self.partial.append(n)
+                n = parent[n]
+        return None
+
+    def _tail_reachable(self, sim, path):
+        # After eating at the end of path, can the head still get back to its tail?
+        cols = sim.cols
+        snake = sim.snake
+        length = len(snake)
+        moves = sim.moves + len(path)
+        # The tail segments that are gone by then, and the new tail
+        gone = min(max(0, len(path) - 1), length)
+        freed = [y * cols + x for x, y in islice(snake, length - gone, length)]
+        if gone < length:
+            x, y = snake[length - 1 - gone]
+            tail = y * cols + x
+        else:
+            tail = path[length]
+        # Lay the grown snake over the grid for the search, then put the grid back
+        grid = sim.grid
+        entered = sim.entered
+        saved = [(grid[cell], entered[cell]) for cell in path]
+        for cell in freed:
+            grid[cell] = 0
+        for i, cell in enumerate(path):
+            grid[cell] = BODY
+            entered[cell] = moves - i
+        try:
+            route = self._seek(sim, path[0], tail, 0, length + 1, moves)
+            if route is None:
+                return False
+            # Kept for after the meal, when there may be no budget left to find one
+            self.escape = route
+            self.escape_from = path[0]
+            self.escape_length = length + 1
+            return True
+        finally:
+            for cell in freed:
+                grid[cell] = BODY
+            for cell, (flags, tick) in zip(path, saved):
+                grid[cell] = flags
+                entered[cell] = tick
+
+    def _follow_tail(self, sim, head):
+        # Step into the free neighbour farthest from the tail that still has a
+        # way back to it, which keeps the snake unwinding instead of closing in
+        # on itself. If the budget runs out first, the kept route is followed
+        cols = sim.cols
+        x, y = sim.snake[-1]
+        # Stepping onto the food grows the snake, so the tail would not move away in time
+        cells = [cell for cell in neighbor_cells(head, cols, sim.rows) if not sim.grid[cell] and cell != self.target]
+        cells.sort(key=lambda cell: abs(cell % cols - x) + abs(cell // cols - y), reverse=True)
+        for cell in cells:
+            if self.budget <= 0:
+                break
+            if self._escape_from(sim, cell):
+                return [cell]
+        if self._escape_step(sim, head) is not None:
+            return [self._take_escape()]
+        return []
+
+    def _roomiest(self, sim, head):
+        # Last resort: step into whichever neighbour opens onto the most free
+        # cells, counting at most ROOMIEST_CAP of them
+        best = []
+        best_area = 0
+        for cell in neighbor_cells(head, sim.cols, sim.rows):
+            if not sim.grid[cell]:
+                area = self._flood(sim, cell, ROOMIEST_CAP)
+                if area > best_area:
+                    best = [cell]
+                    best_area = area
+        return best
+
+    def _flood(self, sim, start, cap):
+        self.stamp += 1
+        stamp = self.stamp
+        cols, rows = sim.cols, sim.rows
+        grid = sim.grid
+        seen = self.seen
+        seen[start] = stamp
+        queue = deque([start])
+        area = 0
+        while queue and area < cap:
+            cell = queue.popleft()
+            area += 1
+            for n in neighbor_cells(cell, cols, rows):
+                if seen[n] != stamp and not grid[n]:
+                    seen[n] = stamp
+                    queue.append(n)
+        return area
+
+
+# ---------------- SIMPLE AGENTS ----------------
+# Baselines for tournaments; each looks one tick ahead only
+def safe_moves(sim):
+    # Directions that do not collide on the next tick
+    hx, hy = sim.snake[0]
+    cols, rows = sim.cols, sim.rows
+    moves = []
+    for name, (dx, dy) in DIRECTIONS.items():
+        x, y = hx + dx, hy + dy
+        if name != OPPOSITE[sim.direction] and 0 <= x < cols and 0 <= y < rows and not sim.grid[y * cols + x]:
+            moves.append(name)
+    return moves
+
+class GreedyAgent:
+    # Straight for the food by Manhattan distance
+    def reset(self):
+        pass
+
+    def decide(self, sim):
+        moves = safe_moves(sim)
+        if not moves or not sim.food:
+            return sim.direction
+        hx, hy = sim.snake[0]
+        fx, fy = sim.food
+        return min(moves, key=lambda d: abs(hx + DIRECTIONS[d][0] - fx) + abs(hy + DIRECTIONS[d][1] - fy))
+
+class RandomAgent:
+    # Wanders, turning now and then, but never into a wall or itself when it can help it
+    def __init__(self, seed=None, turn_chance=0.2):
+        self.rng = random.Random(seed)
+        self.turn_chance = turn_chance
+
+    def reset(self):
+        pass
+
+    def decide(self, sim):
+        moves = safe_moves(sim)
+        if not moves:
+            return sim.direction
+        if sim.direction in moves and self.rng.random() >= self.turn_chance:
+            return sim.direction
+        return self.rng.choice(moves)
+
+AGENTS = {"autopilot": Autopilot, "greedy": GreedyAgent, "random": RandomAgent}
@@ -0,0 +1,297 @@
+import numpy as np
+
+from snake_sim import (
+    DIFFICULTY,
+    DIRECTIONS,
+    MAGNET_RANGE,
+    POWERUP_DURATION,
+    POWERUP_KINDS,
+    POWERUP_SPAWN_SCORE_STEP,
+    SLOW_FACTOR,
+    SPAWN_CLEAR,
+    START_SNAKE,
+    TIMER_UNITS,
+)
+from snake_maps import GROWTH_LEVELS, VARIANTS, get_layout
+
+# Batched SnakeSim: N independent games stored as NumPy arrays and advanced
+# together. Cells are flat indices (row * cols + col); the rules match SnakeSim.
+
+# ---------------- TABLES ----------------
+EMPTY, BODY, HURDLE = 0, 1, 2
+DIRECTION_NAMES = list(DIRECTIONS)  # action codes 0..3: UP, DOWN, LEFT, RIGHT
+DIR_DX = np.array([DIRECTIONS[d][0] for d in DIRECTION_NAMES], dtype=np.int32)
+DIR_DY = np.array([DIRECTIONS[d][1] for d in DIRECTION_NAMES], dtype=np.int32)
+DIR_OPPOSITE = np.array([1, 0, 3, 2], dtype=np.int8)
+SLOW, MAGNET, SHIELD, DOUBLE = (POWERUP_KINDS.index(k) for k in ("slow", "magnet", "shield", "double"))
+MODE_NAMES = list(DIFFICULTY)
+DEATH_CAUSES = [None, "wall", "self", "hurdle"]
+
+class SnakeBatch:
+    def __init__(self, n, cols=40, rows=30, mode="MEDIUM", seed=None):
+        self.n = n
+        self.cols = cols
+        self.rows = rows
+        self.cells = cols * rows
+        self.rng = np.random.default_rng(seed)
+        modes = [mode] * n if isinstance(mode, str) else list(mode)
+        self.modes = modes
+        self.base_speed = np.array([DIFFICULTY[m]["speed"] for m in modes], dtype=np.int32)
+        self.level_step = np.array([DIFFICULTY[m]["level_step"] for m in modes], dtype=np.int32)
+        self.speed_step = np.array([DIFFICULTY[m]["speed_step"] for m in modes], dtype=np.int32)
+        self.mode_index = np.array([MODE_NAMES.index(m) for m in modes], dtype=np.int32)
+        self._load_layouts(sorted(set(modes), key=MODE_NAMES.index))
+
+        self.grid = np.zeros((n, self.cells), dtype=np.int8)
+        # Ring buffer of body cells; body[i, head_ptr[i]] is the head, older segments behind it
+        # (int16 when the board allows: half the memory for the scattered reads and writes)
+        self.body = np.zeros((n, self.cells), dtype=np.int16 if self.cells <= 32767 else np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.head_x = np.zeros(n, dtype=np.int32)
+        self.head_y = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.food = np.zeros(n, dtype=np.int32)
+        self.powerup_pos = np.full(n, -1, dtype=np.int32)
+        self.powerup_kind = np.zeros(n, dtype=np.int8)
+        self.last_powerup_score = np.full(n, -1, dtype=np.int32)
+        self.timers = np.zeros((n, len(POWERUP_KINDS)), dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.level = np.ones(n, dtype=np.int32)
+        self.speed = np.zeros(n, dtype=np.int32)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        # Cause of the last death per game, as an index into DEATH_CAUSES
+        self.death_cause = np.zeros(n, dtype=np.int8)
+        # Row of layout_base / layout_growth each game plays on
+        self.layout = np.zeros(n, dtype=np.int32)
+        # Flat views of grid and body; game i's cells start at offset[i]
+        self.offset = np.arange(n, dtype=np.int64) * self.cells
+        self.flat_grid = self.grid.reshape(-1)
+        self.flat_body = self.body.reshape(-1)
+        self.reset()
+
+    def _load_layouts(self, modes):
+        # The SnakeSim layouts as tables: row mode_index * VARIANTS + variant holds
+        # the base hurdles as a board and the pillars per level, -1 padded
+        rows = len(MODE_NAMES) * VARIANTS
+        layouts = {(m, v): get_layout(self.cols, self.rows, m, v, SPAWN_CLEAR) for m in modes for v in range(VARIANTS)}
+        per_level = max([layout.per_level for layout in layouts.values()] + [1])
+        self.layout_base = np.zeros((rows, self.cells), dtype=np.int8)
+        self.layout_growth = np.full((rows, GROWTH_LEVELS, per_level), -1, dtype=np.int32)
+        for (mode, variant), layout in layouts.items():
+            row = MODE_NAMES.index(mode) * VARIANTS + variant
+            self.layout_base[row, np.asarray(layout.base, dtype=np.int64)] = HURDLE
+            for level in range(GROWTH_LEVELS):
+                pillars = layout.growth[level * layout.per_level:(level + 1) * layout.per_level]
+                self.layout_growth[row, level, :len(pillars)] = pillars
+
+    # ---------------- SAMPLING ----------------
+    def _sample_free(self, games, exclude=None, tries=8):
+        # One uniformly random empty cell per game, -1 when the board is full.
+        # Rejection sampling first; only games that keep missing pay for a full scan.
+        if len(games) == 0:
+            return np.empty(0, dtype=np.int32)
+        picks = self.rng.integers(0, self.cells, len(games)).astype(np.int32)
+        ok = self.flat_grid[self.offset[games] + picks] == EMPTY
+        if exclude is not None:
+            ok &= picks != exclude
+        cells = np.where(ok, picks, -1)
+        pending = np.flatnonzero(~ok)
+        for _ in range(tries - 1):
+            if len(pending) == 0:
+                return cells
+            picks = self.rng.integers(0, self.cells, len(pending)).astype(np.int32)
+            ok = self.flat_grid[self.offset[games[pending]] + picks] == EMPTY
+            if exclude is not None:
+                ok &= picks != exclude[pending]
+            cells[pending[ok]] = picks[ok]
+            pending = pending[~ok]
+        if len(pending):
+            noise = self.rng.random((len(pending), self.cells))
+            noise[self.grid[games[pending]] != EMPTY] = -1.0
+            rows = np.arange(len(pending))
+            if exclude is not None:
+                has = exclude[pending] >= 0
+                noise[rows[has], exclude[pending][has]] = -1.0
+            best = noise.argmax(axis=1)
+            cells[pending] = np.where(noise[rows, best] < 0, -1, best)
+        return cells
+
+    # ---------------- RESET ----------------
+    def reset(self, games=None):
+        if games is None:
+            games = np.arange(self.n)
+        games = np.asarray(games, dtype=np.int64)
+        if len(games) == 0:
+            return
+        k = len(START_SNAKE)
+        start = np.array([y * self.cols + x for x, y in reversed(START_SNAKE)], dtype=np.int32)
+
+        self.layout[games] = self.mode_index[games] * VARIANTS + self.rng.integers(0, VARIANTS, len(games))
+        self.grid[games] = self.layout_base[self.layout[games]]
+        self.body[games, :k] = start
+        self.head_ptr[games] = k - 1
+        self.length[games] = k
+        self.grid[games[:, None], start[None, :]] = BODY
+        self.head_x[games], self.head_y[games] = START_SNAKE[0]
+        self.direction[games] = DIRECTION_NAMES.index("RIGHT")
+
+        self.food[games] = self._sample_free(games)
+        self.powerup_pos[games] = -1
+        self.last_powerup_score[games] = -1
+        self.timers[games] = 0
+        self.score[games] = 0
+        self.level[games] = 1
+        self.speed[games] = self.base_speed[games]
+        self.ticks[games] = 0
+
+    # ---------------- STEP ----------------
+    def step(self, actions=None):
+        # actions: N codes (0..3 as in DIRECTION_NAMES, -1 keeps going straight).
+        # Returns (points gained, done) per game; finished games restart in place.
+        # Everything every game does is done full width on flat indices; the
+        # rarer work (collisions, eating, powerups) only touches the games it applies to.
+        cols, cells = self.cols, self.cells
+        offset = self.offset
+        flat_grid = self.flat_grid
+        flat_body = self.flat_body
+        if actions is not None:
+            # (take() on small tables is a few times faster than fancy indexing)
+            actions = np.asarray(actions).astype(np.int8, copy=False)
+            turn = (actions >= 0) & (actions != DIR_OPPOSITE.take(self.direction))
+            np.copyto(self.direction, actions, where=turn)
+        self.ticks += 1
+        # Rate each game ticks at before anything happens, for the powerup timers
+        speed = self.speed.copy()
+        slow = self.timers[:, SLOW] > 0
+
+        nx = self.head_x + DIR_DX.take(self.direction)
+        ny = self.head_y + DIR_DY.take(self.direction)
+        # Negative coordinates wrap to huge unsigned ones, so one compare per axis
+        wall = (nx.view(np.uint32) >= cols) | (ny.view(np.uint32) >= self.rows)
+        cell = ny * cols + nx
+        cell[wall] = 0
+        occupant = flat_grid[offset + cell]
+        collide = wall | (occupant != EMPTY)
+
+        # Collisions burn a shield instead of killing; that tick nothing else
+        # happens, so those games "move" onto their own head below
+        self.death_cause[:] = 0
+        dead = np.zeros(self.n, dtype=bool)
+        hit = np.flatnonzero(collide)
+        if len(hit):
+            shielded = self.timers[hit, SHIELD] > 0
+            self.timers[hit[shielded], SHIELD] = 0
+            killed = hit[~shielded]
+            dead[killed] = True
+            self.death_cause[killed] = np.where(wall[killed], 1, np.where(occupant[killed] == BODY, 2, 3))
+            cell[hit] = self.head_y[hit] * cols + self.head_x[hit]
+        moving = ~collide
+
+        # Food collision
+        rewards = np.zeros(self.n, dtype=np.int32)
+        ate = np.flatnonzero(cell == self.food)
+        rewards[ate] = np.where(self.timers[ate, DOUBLE] > 0, 20, 10)
+        self.score[ate] += rewards[ate]
+        level_up = ate[self.score[ate] % self.level_step[ate] == 0]
+        self.level[level_up] += 1
+        self.speed[level_up] += self.speed_step[level_up]
+
+        # Everyone else drops their tail. The tail is cleared before the head is
+        # set, so games that don't pop clear the cell their head goes to instead
+        pop = moving.copy()
+        pop[ate] = False
+        tail_ptr = self.head_ptr - self.length + 1
+        tail_ptr[tail_ptr < 0] += cells
+        tail = flat_body[offset + tail_ptr]
+        flat_grid[offset + np.where(pop, tail, cell)] = EMPTY
+        flat_grid[offset + cell] = BODY
+        np.add(self.head_ptr, 1, out=self.head_ptr, where=moving)
+        self.head_ptr[self.head_ptr == cells] = 0
+        flat_body[offset + self.head_ptr] = cell
+        self.length[ate] += 1
+        np.copyto(self.head_x, nx, where=moving)
+        np.copyto(self.head_y, ny, where=moving)
+
+        self.food[ate] = self._sample_free(ate)
+        self._grow_hurdles(level_up)
+        won = np.zeros(self.n, dtype=bool)
+        won[ate[self.food[ate] < 0]] = True
+
+        # Powerup collection
+        got = np.flatnonzero((cell == self.powerup_pos) & moving)
+        self.timers[got, self.powerup_kind[got]] = round(POWERUP_DURATION * TIMER_UNITS)
+        self.powerup_pos[got] = -1
+
+        # Magnet pulls food toward head by one tile
+        pull = np.flatnonzero((self.timers[:, MAGNET] > 0) & moving & (self.food >= 0))
+        fx = self.food[pull] % cols
+        fy = self.food[pull] // cols
+        hx = self.head_x[pull]
+        hy = self.head_y[pull]
+        near = np.abs(hx - fx) + np.abs(hy - fy) <= MAGNET_RANGE
+        cand = (fy + np.sign(hy - fy)) * cols + fx + np.sign(hx - fx)
+        free = flat_grid[offset[pull] + cand] == EMPTY
+        pull_ok = near & free
+        self.food[pull[pull_ok]] = cand[pull_ok]
+
+        # Tick active powerups, taking off this tick's length at the rate it ran at
+        # (Column ORs: a row-wise any() over four columns is several times slower)
+        timers = self.timers
+        running = (timers[:, SLOW] | timers[:, MAGNET] | timers[:, SHIELD] | timers[:, DOUBLE]) > 0
+        timed = np.flatnonzero(running & moving)
+        if len(timed):
+            rate = speed[timed] * np.where(slow[timed], SLOW_FACTOR, 1.0)
+            elapsed = np.rint(TIMER_UNITS / rate).astype(np.int32)
+            timers[timed] = np.maximum(timers[timed] - elapsed[:, None], 0)
+
+        # Spawn new powerups
+        score = self.score
+        spawn = np.flatnonzero(moving & (self.powerup_pos < 0) & (score > 0)
+                               & (score % POWERUP_SPAWN_SCORE_STEP == 0)
+                               & (score != self.last_powerup_score))
+        self.powerup_pos[spawn] = self._sample_free(spawn, exclude=self.food[spawn])
+        self.powerup_kind[spawn] = self.rng.integers(0, len(POWERUP_KINDS), len(spawn))
+        self.last_powerup_score[spawn] = self.score[spawn]
+
+        done = dead | won
+        self.reset(np.flatnonzero(done))
+        return rewards, done
+
+    def _grow_hurdles(self, games):
+        # The layout's pillars for each game's new level, as SnakeSim.grow_hurdles
+        games = games[self.level[games] - 2 < GROWTH_LEVELS]
+        if len(games) == 0:
+            return
+        cells = self.layout_growth[self.layout[games], self.level[games] - 2]
+        ok = cells >= 0
+        cells = np.where(ok, cells, 0)
+        rows = games[:, None]
+        ok &= self.grid[rows, cells] == EMPTY
+        ok &= (cells != self.food[rows]) & (cells != self.powerup_pos[rows])
+        x, y = cells % self.cols, cells // self.cols
+        ok &= np.abs(x - self.head_x[rows]) + np.abs(y - self.head_y[rows]) > 2
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                nx, ny = x + dx, y + dy
+                inside = (nx >= 0) & (nx < self.cols) & (ny >= 0) & (ny < self.rows)
+                around = np.where(inside, ny * self.cols + nx, 0)
+                ok &= ~(inside & (self.grid[rows, around] == HURDLE))
+        hit_rows, hit_cols = np.nonzero(ok)
+        self.grid[games[hit_rows], cells[hit_rows, hit_cols]] = HURDLE
+
+    # ---------------- VIEWS ----------------
+    def observation(self):
+        # (N, rows, cols) boards: 0 empty, 1 body, 2 hurdle, 3 food, 4 powerup, 5 head
+        obs = self.grid.copy()
+        idx = np.arange(self.n)
+        has_powerup = self.powerup_pos >= 0
+        obs[idx[has_powerup], self.powerup_pos[has_powerup]] = 4
+        obs[idx, self.food] = 3
+        obs[idx, self.head_y * self.cols + self.head_x] = 5
+        return obs.reshape(self.n, self.rows, self.cols)
+
+    def snake(self, game):
+        # Body cells of one game as (col, row) tuples, head first
+        ptr = (self.head_ptr[game] - np.arange(self.length[game])) % self.cells
+        return [(int(c % self.cols), int(c // self.cols)) for c in self.body[game, ptr]]
@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+# Headless benchmarks for the rendering and simulation hot paths.
+#   python snake_bench.py --output bench.json
+#   python snake_bench.py --compare bench.json      # exits 1 on regressions
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import snake_game
+from snake_agent import Autopilot
+from snake_maps import build_layout, decode_layout, encode_layout
+from snake_particles import create_pool
+from snake_sim import BODY, DIRECTIONS, SPAWN_CLEAR, FreeCells, SnakeSim, generate_hurdles, spawn_food
+
+WINDOW_SIZES = [(800, 600), (1280, 720), (1920, 1080)]
+SNAKE_LENGTHS = [3, 50, 200, 500, 1000, 2000]
+PARTICLE_COUNTS = [256, 1024, 4096]
+FILL_RATIOS = [0.10, 0.50, 0.90, 0.99]
+SEED = 1234
+
+def timeit(fn, number, repeat):
+    # Per-call times in microseconds, one sample per round
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return {"median_us": statistics.median(samples), "min_us": min(samples), "number": number, "repeat": repeat}
+
+def set_window(width, height):
+    snake_game.WIDTH, snake_game.HEIGHT = width, height
+    snake_game.screen = pygame.display.set_mode((width, height))
+    snake_game.invalidate_background()
+
+def rebuild_background():
+    snake_game.invalidate_background()
+    snake_game.get_background()
+
+def serpentine(length, cols, rows):
+    # Head-first body that zigzags across the board, wrapping when longer than the board
+    cells = []
+    for i in range(length):
+        row = (i // cols) % rows
+        col = i % cols if row % 2 == 0 else cols - 1 - i % cols
+        cells.append((col, row))
+    cells.reverse()
+    return cells
+
+# ---------------- CASES ----------------
+def bench_rendering(results, number, repeat, only):
+    for width, height in WINDOW_SIZES:
+        set_window(width, height)
+        cols, rows = width // snake_game.BLOCK_SIZE, height // snake_game.BLOCK_SIZE
+        size = f"{width}x{height}"
+
+        name = f"render/build_background/{size}"
+        if only(name):
+            results[name] = timeit(rebuild_background, 1, max(3, repeat))
+        name = f"render/draw_background/{size}"
+        if only(name):
+            snake_game.get_background()
+            results[name] = timeit(snake_game.draw_background, number, repeat)
+        name = f"render/draw_grid/{size}"
+        if only(name):
+            surface = pygame.Surface((width, height))
+            results[name] = timeit(
+                lambda: snake_game.draw_grid(surface, width, height, snake_game.BLOCK_SIZE), number, repeat)
+        for length in SNAKE_LENGTHS:
+            name = f"render/draw_snake/{size}/len{length}"
+            if only(name):
+                snake = serpentine(length, cols, rows)
+                clock = iter(range(10 ** 9))
+                results[name] = timeit(lambda: snake_game.draw_snake(snake, next(clock) * 0.016), number, repeat)
+
+def bench_particles(results, number, repeat, only):
+    # One frame's update and draw with the pool holding this many live particles
+    set_window(*WINDOW_SIZES[0])
+    pool = create_pool(seed=SEED)
+    if not pool:
+        return
+    for count in PARTICLE_COUNTS:
+        name = f"render/particles/live{count}"
+        if only(name):
+            pool.clear()
+            for i in range(count // 64):
+                pool.emit(100 + i * 37 % 600, 100 + i * 53 % 400, 64, snake_game.ORANGE, life=1e9)
+
+            def frame():
+                pool.update(0.016)
+                pool.draw(snake_game.screen)
+            results[name] = timeit(frame, number, repeat)
+
+def bench_spawning(results, number, repeat, only):
+    cols, rows = 40, 30
+    rng = random.Random(SEED)
+    for ratio in FILL_RATIOS:
+        name = f"sim/spawn_food/fill{round(ratio * 100)}"
+        if only(name):
+            grid = bytearray(cols * rows)
+            for cell in rng.sample(range(cols * rows), int(cols * rows * ratio)):
+                grid[cell] = BODY
+            free = FreeCells(grid)
+            results[name] = timeit(lambda: spawn_food(free, cols, rng), number * 10, repeat)
+    for mode in ("MEDIUM", "HARD"):
+        name = f"sim/generate_hurdles/{mode}"
+        if only(name):
+            grid = bytearray(cols * rows)
+            # Each call consumes its free-cell index, so hand out fresh ones outside the timing
+            pool = [FreeCells(grid) for _ in range(number * repeat)]
+            results[name] = timeit(lambda: generate_hurdles(mode, pool.pop(), cols, rng), number, repeat)
+
+def bench_maps(results, number, repeat, only):
+    # Building a layout from scratch, reading one back from its cache file, and a
+    # game reset once the layout is in memory
+    cols, rows = 40, 30
+    clear = [y * cols + x for x, y in SPAWN_CLEAR]
+    for mode in ("MEDIUM", "HARD"):
+        name = f"maps/build/{mode}"
+        if only(name):
+            variants = iter(range(10 ** 12))
+            results[name] = timeit(lambda: build_layout(cols, rows, mode, next(variants), SPAWN_CLEAR),
+                                   max(1, number // 50), repeat)
+        name = f"maps/decode/{mode}"
+        if only(name):
+            data = encode_layout(build_layout(cols, rows, mode, 0, SPAWN_CLEAR), mode, 0, clear)
+            results[name] = timeit(lambda: decode_layout(data, cols, rows, mode, 0, clear), number * 10, repeat)
+        name = f"sim/reset/{mode}"
+        if only(name):
+            sim = SnakeSim(cols, rows, seed=SEED, mode=mode)
+            seeds = iter(range(10 ** 12))
+            results[name] = timeit(lambda: sim.reset(next(seeds)), number, repeat)
+
+def bench_stepping(results, number, repeat, only):
+    steps = number * 50
+    for mode in ("EASY", "MEDIUM", "HARD"):
+        name = f"sim/step/{mode}"
+        if not only(name):
+            continue
+        rng = random.Random(SEED)
+        sim = SnakeSim(seed=SEED, mode=mode)
+        directions = list(DIRECTIONS)
+        actions = [rng.choice(directions) if rng.random() < 0.2 else None for _ in range(4096)]
+        counter = iter(range(10 ** 12))
+
+        def step():
+            i = next(counter)
+            sim.step(actions[i & 4095])
+            if not sim.alive:
+                sim.reset(i, mode)
+        results[name] = timeit(step, steps, repeat)
+        results[name]["steps_per_s"] = 1e6 / results[name]["median_us"]
+    name = "agent/autopilot/MEDIUM"
+    if only(name):
+        sim = SnakeSim(seed=SEED, mode="MEDIUM")
+        pilot = Autopilot()
+        counter = iter(range(10 ** 12))
+
+        def drive():
+            sim.turn(pilot.decide(sim))
+            sim.step()
+            if not sim.alive:
+                sim.reset(next(counter), "MEDIUM")
+                pilot.reset()
+        results[name] = timeit(drive, steps, repeat)
+        results[name]["steps_per_s"] = 1e6 / results[name]["median_us"]
+    name = "sim/batch_step/HARD/n4096"
+    if only(name):
+        try:
+            import numpy as np
+            from snake_batch import SnakeBatch
+        except ImportError:
+            return
+        batch = SnakeBatch(4096, mode="HARD", seed=SEED)
+        np_rng = np.random.default_rng(SEED)
+        actions = np.where(np_rng.random((64, 4096)) < 0.2, np_rng.integers(0, 4, (64, 4096)), -1)
+        counter = iter(range(10 ** 12))
+        results[name] = timeit(lambda: batch.step(actions[next(counter) & 63]), max(1, number // 4), repeat)
+        results[name]["steps_per_s"] = 4096 * 1e6 / results[name]["median_us"]
+
+# ---------------- REPORTING ----------------
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"  new   {name}: {result['median_us']:.2f} us")
+            continue
+        change = result["median_us"] / base["median_us"] - 1.0
+        flag = "SLOWER" if change > threshold else "faster" if change < -threshold else "ok"
+        print(f"  {flag:<6} {name}: {base['median_us']:.2f} -> {result['median_us']:.2f} us ({change:+.1%})")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snake Game benchmarks")
+    parser.add_argument("--output", "-o", help="write results as JSON to this path")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a previous JSON run")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default 0.10)")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for smoke runs")
+    args = parser.parse_args(argv)
+
+    number, repeat = (20, 3) if args.quick else (200, 7)
+    snake_game.init()
+    def only(name):
+        return args.filter in name
+
+    results = {}
+    bench_rendering(results, number, repeat, only)
+    bench_particles(results, number, repeat, only)
+    bench_spawning(results, number, repeat, only)
+    bench_maps(results, number, repeat, only)
+    bench_stepping(results, number, repeat, only)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+            "seed": SEED,
+        },
+        "results": results,
+    }
+    for name, result in sorted(results.items()):
+        extra = f"  ({result['steps_per_s']:,.0f} steps/s)" if "steps_per_s" in result else ""
+        print(f"{name:<45} {result['median_us']:>12.2f} us{extra}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst {args.compare} (threshold {args.threshold:.0%}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s)")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+# File helpers shared by the modules that keep state on disk. Nothing here
+# imports the rest of the game, so any module can use it.
+
+# Caches sit next to the game, not in whatever directory it was started from.
+# SNAKE_CACHE_DIR moves them, e.g. when the game folder is read-only
+CACHE_DIR = os.environ.get("SNAKE_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+def write_atomic(path, text):
+    # Write a temp file next to the target, then rename over it in one step.
+    # bytes are written as they are, str as text
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(text, bytes) else "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
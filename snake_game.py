@@ -1,24 +1,44 @@
+import time
+# Taken before anything else is imported, for the startup time reported with --profile
+IMPORT_TIME = time.perf_counter()
 import pygame
+import argparse
 import random
 import sys
 import os
 import math
+from collections import OrderedDict, deque
+from itertools import islice
+from snake_agent import Autopilot
+from snake_files import CACHE_DIR, write_atomic
+from snake_maps import parse_size
+from snake_particles import NullParticles, create_pool
+from snake_profiler import FrameProfiler, NullProfiler
+from snake_replay import Player, Recorder, Recording, ReplayError, recording_path
+from snake_scores import ScoreStore
+from snake_sim import BODY, DIRECTIONS, OPPOSITE, SnakeSim
 # python "d:/My projects/Snake game/snake_game.py"
 
 # ---------------- INITIALIZATION ----------------
-pygame.init()
-
 WIDTH, HEIGHT = 800, 600
 BLOCK_SIZE = 20
 MIN_WIDTH, MIN_HEIGHT = 640, 480
+# Frames per second drawn while playing (0 = uncapped); the game itself ticks at its own speed
+RENDER_FPS = int(os.environ.get("SNAKE_RENDER_FPS", "60"))
+MAX_TICKS_PER_FRAME = 5
+# Menus sleep until there is input; the pause screen still animates at this rate
+IDLE_ANIMATION_FPS = 10
 HIGH_SCORE_FILE = "high_score.txt"
-POWERUP_DURATION = 6.0
-POWERUP_SPAWN_SCORE_STEP = 70
-
-screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-pygame.display.set_caption("Snake Game")
+# Font name -> file found by the last system font scan ("" when not installed)
+FONT_CACHE_FILE = os.path.join(CACHE_DIR, "font_cache.txt")
+# Where --profile writes when given no path
+PROFILE_FILE = os.path.join(CACHE_DIR, "snake_profile.json")
 
-clock = pygame.time.Clock()
+# Opened by init(), so the module can be imported without a window
+screen = None
+clock = None
+font = big_font = small_font = None
+startup = {"first_frame_ms": None}
 
 # Colors (bright yellow theme)
 WHITE = (250, 248, 230)
@@ -28,11 +48,13 @@ YELLOW_DARK = (200, 160, 40)
 ORANGE = (255, 170, 60)
 ORANGE_DARK = (210, 120, 40)
 BLUE = (90, 140, 210)
+RED = (230, 80, 60)
 BG_DARK = (36, 30, 10)
 BG_LIGHT = (52, 44, 18)
 BG_MID = (70, 58, 22)
 GRID = (84, 72, 30)
 ACCENT = (255, 230, 120)
+FOOD_GLOW = (255, 190, 80, 120)
 POWERUP_COLORS = {
     "slow": (120, 200, 255),
     "magnet": (255, 180, 120),
@@ -40,40 +62,243 @@ POWERUP_COLORS = {
     "double": (255, 240, 120),
 }
 
-# Fonts
-font = pygame.font.SysFont("arial", 30)
-big_font = pygame.font.SysFont("arial", 60)
+# Pre-rendered static background, keyed by (WIDTH, HEIGHT, BLOCK_SIZE). "backdrop"
+# is the last full render_background pass, which is stretched to stand in while
+# the window is still being resized
+background_cache = {"key": None, "surface": None, "backdrop": None, "stretched": False}
+# Resizes land once per frame; the slow background pass waits until the window
+# size has held still for RESIZE_SETTLE seconds
+RESIZE_SETTLE = 0.25
+live_resize = {"until": 0.0}
+
+# Frame timing instrumentation, replaced by a FrameProfiler with --profile or SNAKE_PROFILE
+profiler = NullProfiler()
+OVERLAY_PHASES = {"hurdle": "hurdles", "hud": "hud", "button": "hud"}
+
+# Pre-rendered snake, food and powerup sprites, keyed by BLOCK_SIZE and palette
+sprite_cache = {"key": None, "sprites": None}
+
+# Dirty-rect rendering for the PLAYING loop (opt-in with SNAKE_DIRTY_RECTS=1)
+DIRTY_RECTS = os.environ.get("SNAKE_DIRTY_RECTS") == "1"
+dirty_state = {"full": True, "sprites": [], "overlays": {}}
+
+# Bursts and trails drawn over the board (SNAKE_PARTICLES=0 turns them off)
+PARTICLES = os.environ.get("SNAKE_PARTICLES", "1") != "0"
+particles = create_pool() if PARTICLES else NullParticles()
+
+# ---------------- TEXT ----------------
+class TextCache:
+    # Bounded LRU of rendered text surfaces keyed by (font, text, color, antialias)
+    def __init__(self, size=256):
+        self.size = size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.surfaces)}
+
+text_cache = TextCache()
+
+font_paths = {}
+
+def read_font_cache(path):
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return {}
+    entries = {}
+    for line in lines:
+        name, sep, font_path = line.partition("\t")
+        if sep:
+            entries[name] = font_path
+    return entries
+
+def find_font(name):
+    # Path for Font(), or None for pygame's bundled default. Looking a name up
+    # scans every installed font, so answers are remembered in FONT_CACHE_FILE
+    if not font_paths:
+        font_paths.update(read_font_cache(FONT_CACHE_FILE))
+    path = font_paths.get(name)
+    if path is None or path and not os.path.exists(path):
+        path = pygame.font.match_font(name) or ""
+        font_paths[name] = path
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            write_atomic(FONT_CACHE_FILE, "".join(f"{n}\t{p}\n" for n, p in font_paths.items()))
+        except OSError:
+            pass
+    return path or None
+
+def load_fonts(name="arial"):
+    global font, big_font, small_font
+    path = find_font(name)
+    font = pygame.font.Font(path, 30)
+    big_font = pygame.font.Font(path, 60)
+    small_font = pygame.font.Font(path, 18)
+    # Surfaces rendered with the old fonts are stale
+    text_cache.clear()
+
+KEY_DIRECTIONS = {
+    pygame.K_UP: "UP",
+    pygame.K_DOWN: "DOWN",
+    pygame.K_LEFT: "LEFT",
+    pygame.K_RIGHT: "RIGHT",
+}
+
+# Event types the game reads; SDL drops the rest before they reach Python
+HANDLED_EVENTS = [
+    pygame.QUIT, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED,
+    pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION,
+]
+
+# Buttons each idle screen shows; hovering them changes the picture
+SCREEN_BUTTONS = {
+    "START": ("modes", "auto", "start", "help", "quit"),
+    "HELP": ("back",),
+    "GAME_OVER": ("over_restart", "over_menu", "over_quit"),
+    "PAUSED": ("resume", "menu"),
+}
+
+def init():
+    # Only the subsystems the game uses; pygame.init() would also start audio and joysticks
+    global screen, clock
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption("Snake Game")
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(HANDLED_EVENTS)
+    clock = pygame.time.Clock()
+    load_fonts()
+
+def report_startup():
+    # Called after each presented frame; only the first one counts
+    if startup["first_frame_ms"] is None:
+        startup["first_frame_ms"] = (time.perf_counter() - IMPORT_TIME) * 1000.0
+        if profiler:
+            profiler.startup_ms = startup["first_frame_ms"]
+            print(f"First frame {startup['first_frame_ms']:.0f} ms after start")
+
+# ---------------- INPUT ----------------
+class TurnQueue:
+    # Turns pressed since the last tick, handed to the sim one per tick. Two
+    # presses inside one tick (UP then LEFT while heading RIGHT) become two
+    # turns instead of the second overwriting the first.
+    def __init__(self, size=3):
+        self.size = size
+        self.turns = deque()
+
+    def __len__(self):
+        return len(self.turns)
+
+    def clear(self):
+        self.turns.clear()
+
+    def push(self, direction, heading, stamp):
+        # heading is the sim's direction; queued turns are checked against the one before them
+        last = self.turns[-1][0] if self.turns else heading
+        if direction == last or direction == OPPOSITE[last]:
+            return
+        if len(self.turns) >= self.size:
+            profiler.drop_input()
+            return
+        self.turns.append((direction, stamp))
+
+    def apply(self, sim):
+        # Right before sim.step(); the latency runs from reading the key to the move
+        if self.turns:
+            direction, stamp = self.turns.popleft()
+            sim.turn(direction)
+            profiler.record_input(time.perf_counter() - stamp)
 
 # ---------------- FUNCTIONS ----------------
 def draw_text(text, font, color, x, y):
-    screen.blit(font.render(text, True, color), (x, y))
+    return screen.blit(text_cache.render(font, text, color), (x, y))
 
 def draw_centered(text, font, color, y):
-    surface = font.render(text, True, color)
+    surface = text_cache.render(font, text, color)
     x = (WIDTH - surface.get_width()) // 2
     screen.blit(surface, (x, y))
 
-def draw_background():
+def render_background(surface, width, height):
     # Gradient base
-    for y in range(HEIGHT):
-        t = y / max(1, HEIGHT - 1)
+    for y in range(height):
+        t = y / max(1, height - 1)
         r = int(BG_DARK[0] * (1 - t) + BG_MID[0] * t)
         g = int(BG_DARK[1] * (1 - t) + BG_MID[1] * t)
         b = int(BG_DARK[2] * (1 - t) + BG_MID[2] * t)
-        pygame.draw.line(screen, (r, g, b), (0, y), (WIDTH, y))
+        pygame.draw.line(surface, (r, g, b), (0, y), (width, y))
 
     # Soft diagonal grid lines
-    for x in range(-HEIGHT, WIDTH, 50):
-        pygame.draw.line(screen, BG_LIGHT, (x, 0), (x + HEIGHT, HEIGHT), 1)
+    for x in range(-height, width, 50):
+        pygame.draw.line(surface, BG_LIGHT, (x, 0), (x + height, height), 1)
 
     # Floating nodes
-    for i in range(0, WIDTH, 140):
-        pygame.draw.circle(screen, GRID, (i, (i * 3) % HEIGHT), 18, 1)
+    for i in range(0, width, 140):
+        pygame.draw.circle(surface, GRID, (i, (i * 3) % height), 18, 1)
 
     # Subtle vignette
-    vignette = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    pygame.draw.rect(vignette, (0, 0, 0, 70), (0, 0, WIDTH, HEIGHT), border_radius=24)
-    screen.blit(vignette, (0, 0))
+    vignette = pygame.Surface((width, height), pygame.SRCALPHA)
+    pygame.draw.rect(vignette, (0, 0, 0, 70), (0, 0, width, height), border_radius=24)
+    surface.blit(vignette, (0, 0))
+
+def resizing():
+    return time.perf_counter() < live_resize["until"]
+
+def get_backdrop(cache, width, height):
+    # render_background output for the window, or mid-resize the cache's last one
+    # stretched to fit, which costs a fraction of the full pass. Returns
+    # (surface, stretched); only a stretched surface may be drawn on.
+    if cache["backdrop"] is not None and resizing():
+        return pygame.transform.scale(cache["backdrop"], (width, height)), True
+    backdrop = pygame.Surface((width, height)).convert()
+    render_background(backdrop, width, height)
+    cache["backdrop"] = backdrop
+    return backdrop, False
+
+def build_background(width, height, block_size):
+    # Everything static behind the playfield, composited once per window size
+    backdrop, stretched = get_backdrop(background_cache, width, height)
+    surface = backdrop if stretched else backdrop.copy()
+    draw_grid(surface, width, height, block_size)
+    draw_border(surface, width, height)
+    return surface, stretched
+
+def get_background():
+    key = (WIDTH, HEIGHT, BLOCK_SIZE)
+    if background_cache["key"] != key or background_cache["stretched"] and not resizing():
+        if background_cache["stretched"]:
+            # Dirty-rect frames restore from the background, so swap it in everywhere at once
+            request_full_repaint()
+        background_cache["surface"], background_cache["stretched"] = build_background(WIDTH, HEIGHT, BLOCK_SIZE)
+        background_cache["key"] = key
+    return background_cache["surface"]
+
+def invalidate_background():
+    background_cache.update(key=None, surface=None, backdrop=None, stretched=False)
+
+def draw_background():
+    # Gradient, diagonals, nodes, vignette, grid and border in a single blit
+    screen.blit(get_background(), (0, 0))
 
 def draw_button(rect, label, is_active=False, is_hover=False):
     bg = (32, 46, 68)
@@ -83,188 +308,499 @@ def draw_button(rect, label, is_active=False, is_hover=False):
         bg = (60, 92, 140)
     pygame.draw.rect(screen, bg, rect, border_radius=8)
     pygame.draw.rect(screen, ACCENT, rect, 2, border_radius=8)
-    text_surface = font.render(label, True, WHITE)
+    text_surface = text_cache.render(font, label, WHITE)
     text_rect = text_surface.get_rect(center=rect.center)
     screen.blit(text_surface, text_rect)
+    return rect
 
-def draw_grid():
-    for x in range(0, WIDTH, BLOCK_SIZE):
-        pygame.draw.line(screen, GRID, (x, 0), (x, HEIGHT))
-    for y in range(0, HEIGHT, BLOCK_SIZE):
-        pygame.draw.line(screen, GRID, (0, y), (WIDTH, y))
+def draw_grid(surface, width, height, block_size):
+    for x in range(0, width, block_size):
+        pygame.draw.line(surface, GRID, (x, 0), (x, height))
+    for y in range(0, height, block_size):
+        pygame.draw.line(surface, GRID, (0, y), (width, y))
 
-def draw_border():
-    pygame.draw.rect(screen, ACCENT, (0, 0, WIDTH, HEIGHT), 3)
+def draw_border(surface, width, height):
+    pygame.draw.rect(surface, ACCENT, (0, 0, width, height), 3)
 
 def draw_panel(rect, title=None, title_offset=0):
     pygame.draw.rect(screen, (20, 30, 46), rect, border_radius=12)
     pygame.draw.rect(screen, ACCENT, rect, 2, border_radius=12)
     if title:
-        title_surface = font.render(title, True, ACCENT)
+        title_surface = text_cache.render(font, title, ACCENT)
         title_rect = title_surface.get_rect(midtop=(rect.centerx, rect.top + 10 + title_offset))
         screen.blit(title_surface, title_rect)
 
-def draw_snake(snake, t):
-    if not snake:
-        return
-    head = snake[0]
-    neck = snake[1] if len(snake) > 1 else (head[0] - BLOCK_SIZE, head[1])
-    dx = head[0] - neck[0]
-    dy = head[1] - neck[1]
-    if dx == 0 and dy == 0:
-        dx, dy = BLOCK_SIZE, 0
-    # Normalize to unit direction (-1, 0, 1)
-    dir_x = 0 if dx == 0 else int(dx / abs(dx))
-    dir_y = 0 if dy == 0 else int(dy / abs(dy))
+def snake_positions(snake, alpha=1.0, tail=None):
+    # Pixel position of every segment, blended by alpha from where it was on the
+    # previous tick (the next segment's cell, or the popped tail) to its current cell
+    cells = list(snake)
+    if alpha >= 1.0:
+        return [(x * BLOCK_SIZE, y * BLOCK_SIZE) for x, y in cells]
+    previous = cells[1:]
+    previous.append(tail or cells[-1])
+    return [
+        (round((px + (x - px) * alpha) * BLOCK_SIZE), round((py + (y - py) * alpha) * BLOCK_SIZE))
+        for (x, y), (px, py) in zip(cells, previous)
+    ]
 
+def sprite_pad():
+    # How far the head glow and tongue reach past the head's cell
+    return max((BLOCK_SIZE + 1) // 2, 10)
+
+def render_head(surface, x, y, dir_x, dir_y, tongue):
     # Head glow
-    glow = pygame.Surface((BLOCK_SIZE * 2, BLOCK_SIZE * 2), pygame.SRCALPHA)
-    pygame.draw.circle(glow, (255, 210, 80, 120), (BLOCK_SIZE, BLOCK_SIZE), BLOCK_SIZE)
-    screen.blit(glow, (head[0] - BLOCK_SIZE // 2, head[1] - BLOCK_SIZE // 2))
-    pygame.draw.rect(screen, YELLOW, (*head, BLOCK_SIZE, BLOCK_SIZE), border_radius=10)
-    pygame.draw.rect(screen, YELLOW_DARK, (*head, BLOCK_SIZE, BLOCK_SIZE), 2, border_radius=10)
+    center = (x + BLOCK_SIZE - BLOCK_SIZE // 2, y + BLOCK_SIZE - BLOCK_SIZE // 2)
+    pygame.draw.circle(surface, (255, 210, 80, 120), center, BLOCK_SIZE)
+    pygame.draw.rect(surface, YELLOW, (x, y, BLOCK_SIZE, BLOCK_SIZE), border_radius=10)
+    pygame.draw.rect(surface, YELLOW_DARK, (x, y, BLOCK_SIZE, BLOCK_SIZE), 2, border_radius=10)
 
     # Eyes
     eye_offset_x = 5 * dir_x
     eye_offset_y = 5 * dir_y
-    eye_base_x = head[0] + BLOCK_SIZE // 2 + eye_offset_x
-    eye_base_y = head[1] + BLOCK_SIZE // 2 + eye_offset_y
+    eye_base_x = x + BLOCK_SIZE // 2 + eye_offset_x
+    eye_base_y = y + BLOCK_SIZE // 2 + eye_offset_y
     eye_side_dx = -dir_y * 5
     eye_side_dy = dir_x * 5
-    pygame.draw.circle(screen, WHITE, (eye_base_x + eye_side_dx, eye_base_y + eye_side_dy), 3)
-    pygame.draw.circle(screen, WHITE, (eye_base_x - eye_side_dx, eye_base_y - eye_side_dy), 3)
-    pygame.draw.circle(screen, BLACK, (eye_base_x + eye_side_dx, eye_base_y + eye_side_dy), 1)
-    pygame.draw.circle(screen, BLACK, (eye_base_x - eye_side_dx, eye_base_y - eye_side_dy), 1)
+    pygame.draw.circle(surface, WHITE, (eye_base_x + eye_side_dx, eye_base_y + eye_side_dy), 3)
+    pygame.draw.circle(surface, WHITE, (eye_base_x - eye_side_dx, eye_base_y - eye_side_dy), 3)
+    pygame.draw.circle(surface, BLACK, (eye_base_x + eye_side_dx, eye_base_y + eye_side_dy), 1)
+    pygame.draw.circle(surface, BLACK, (eye_base_x - eye_side_dx, eye_base_y - eye_side_dy), 1)
 
-    # Tongue (flicker)
-    if int(t * 6) % 2 == 0:
+    # Tongue
+    if tongue:
         tongue_len = 8
-        tongue_x = head[0] + BLOCK_SIZE // 2 + dir_x * (BLOCK_SIZE // 2)
-        tongue_y = head[1] + BLOCK_SIZE // 2 + dir_y * (BLOCK_SIZE // 2)
+        tongue_x = x + BLOCK_SIZE // 2 + dir_x * (BLOCK_SIZE // 2)
+        tongue_y = y + BLOCK_SIZE // 2 + dir_y * (BLOCK_SIZE // 2)
         tip_x = tongue_x + dir_x * tongue_len
         tip_y = tongue_y + dir_y * tongue_len
-        pygame.draw.line(screen, ORANGE_DARK, (tongue_x, tongue_y), (tip_x, tip_y), 2)
+        pygame.draw.line(surface, ORANGE_DARK, (tongue_x, tongue_y), (tip_x, tip_y), 2)
         # Forked tip
-        pygame.draw.line(screen, ORANGE_DARK, (tip_x, tip_y), (tip_x - dir_y * 3, tip_y + dir_x * 3), 2)
-        pygame.draw.line(screen, ORANGE_DARK, (tip_x, tip_y), (tip_x + dir_y * 3, tip_y - dir_x * 3), 2)
+        pygame.draw.line(surface, ORANGE_DARK, (tip_x, tip_y), (tip_x - dir_y * 3, tip_y + dir_x * 3), 2)
+        pygame.draw.line(surface, ORANGE_DARK, (tip_x, tip_y), (tip_x + dir_y * 3, tip_y - dir_x * 3), 2)
+
+def render_segment(surface, x, y, shade):
+    seg_rect = (x, y, BLOCK_SIZE, BLOCK_SIZE)
+    pygame.draw.rect(surface, shade, seg_rect, border_radius=10)
+    pygame.draw.rect(surface, YELLOW_DARK, seg_rect, 1, border_radius=10)
+    # Scales
+    scale_r = 3
+    for ox, oy in ((6, 6), (14, 8), (10, 14)):
+        pygame.draw.circle(surface, BG_LIGHT, (x + ox, y + oy), scale_r, 1)
+
+def render_orb(color, glow, radius):
+    # Glowing orb centred in a 3x3-cell sprite, used for food and powerups
+    size = BLOCK_SIZE * 3
+    c = size // 2
+    surface = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(surface, glow, (c, c), BLOCK_SIZE)
+    pygame.draw.circle(surface, color, (c, c), radius)
+    pygame.draw.circle(surface, WHITE, (c - 3, c - 3), max(2, radius // 3))
+    return surface.convert_alpha()
+
+def food_radius(t):
+    return int((BLOCK_SIZE // 2 - 2) * (1.0 + 0.1 * math.sin(t * 6)))
+
+def powerup_radius(t):
+    return int((BLOCK_SIZE // 2 - 3) * (1.0 + 0.15 * math.sin(t * 6 + 1.2)))
+
+def build_sprites():
+    pad = sprite_pad()
+    size = BLOCK_SIZE + pad * 2
+    sprites = {"pad": pad, "head": {}, "body": [], "food": {}, "powerup": {}}
+    for dir_x, dir_y in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+        for tongue in (False, True):
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            render_head(surface, pad, pad, dir_x, dir_y, tongue)
+            sprites["head"][(dir_x, dir_y, tongue)] = surface.convert_alpha()
+    # Segments alternate shades: even indices dark, odd indices light
+    for shade in (YELLOW_DARK, YELLOW):
+        surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
+        render_segment(surface, 0, 0, shade)
+        sprites["body"].append(surface.convert_alpha())
+    # Every radius the pulse animations can produce
+    for radius in range(food_radius(-math.pi / 12), food_radius(math.pi / 12) + 1):
+        sprites["food"][radius] = render_orb(ORANGE, FOOD_GLOW, radius)
+    for kind, color in POWERUP_COLORS.items():
+        for radius in range(powerup_radius((-math.pi / 2 - 1.2) / 6), powerup_radius((math.pi / 2 - 1.2) / 6) + 1):
+            sprites["powerup"][(kind, radius)] = render_orb(color, (*color, 110), radius)
+    return sprites
+
+def get_sprites():
+    key = (BLOCK_SIZE, YELLOW, YELLOW_DARK, ORANGE, ORANGE_DARK, FOOD_GLOW, WHITE, BLACK, BG_LIGHT,
+           tuple(POWERUP_COLORS.items()))
+    if sprite_cache["key"] != key:
+        sprite_cache["sprites"] = build_sprites()
+        sprite_cache["key"] = key
+    return sprite_cache["sprites"]
+
+def draw_snake(snake, t, alpha=1.0, tail=None, offset=(0, 0)):
+    # offset is the camera position in world mode: subtracted from every sprite
+    if not snake:
+        return
+    positions = snake_positions(snake, alpha, tail)
+    draw_snake_head(snake, positions[0], t, offset)
 
-    # Body with scale pattern
-    for i, segment in enumerate(snake[1:], start=1):
+    # Body with scale pattern, in one batched blit
+    body = get_sprites()["body"]
+    ox, oy = offset
+    blits = []
+    for i, (sx, sy) in enumerate(islice(positions, 1, None), start=1):
         wiggle = int(2 * math.sin(t * 5 + i * 0.6))
-        sx, sy = segment
-        seg_rect = (sx + wiggle, sy - wiggle, BLOCK_SIZE, BLOCK_SIZE)
-        shade = (YELLOW_DARK if i % 2 == 0 else YELLOW)
-        pygame.draw.rect(screen, shade, seg_rect, border_radius=10)
-        pygame.draw.rect(screen, YELLOW_DARK, seg_rect, 1, border_radius=10)
-        # Scales
-        scale_r = 3
-        for ox, oy in ((6, 6), (14, 8), (10, 14)):
-            pygame.draw.circle(screen, BG_LIGHT, (sx + wiggle + ox, sy - wiggle + oy), scale_r, 1)
-
-def draw_food(food, t):
-    cx = food[0] + BLOCK_SIZE // 2
-    cy = food[1] + BLOCK_SIZE // 2
-    pulse = 1.0 + 0.1 * math.sin(t * 6)
-    radius = int((BLOCK_SIZE // 2 - 2) * pulse)
-    # Glow
-    glow = pygame.Surface((BLOCK_SIZE * 3, BLOCK_SIZE * 3), pygame.SRCALPHA)
-    pygame.draw.circle(glow, (255, 190, 80, 120), (BLOCK_SIZE * 3 // 2, BLOCK_SIZE * 3 // 2), BLOCK_SIZE)
-    screen.blit(glow, (cx - BLOCK_SIZE * 3 // 2, cy - BLOCK_SIZE * 3 // 2))
-    pygame.draw.circle(screen, ORANGE, (cx, cy), radius)
+        blits.append((body[i % 2], (sx + wiggle - ox, sy - wiggle - oy)))
+    screen.blits(blits, doreturn=False)
+
+def draw_snake_head(snake, head, t, offset=(0, 0)):
+    sprites = get_sprites()
+    neck = snake[1] if len(snake) > 1 else (snake[0][0] - 1, snake[0][1])
+    dx = snake[0][0] - neck[0]
+    dy = snake[0][1] - neck[1]
+    if dx == 0 and dy == 0:
+        dx, dy = 1, 0
+    # Normalize to unit direction (-1, 0, 1)
+    dir_x = 0 if dx == 0 else int(dx / abs(dx))
+    dir_y = 0 if dy == 0 else int(dy / abs(dy))
+
+    # Head, with the tongue flickering in and out
+    pad = sprites["pad"]
+    tongue = int(t * 6) % 2 == 0
+    screen.blit(sprites["head"][(dir_x, dir_y, tongue)], (head[0] - pad - offset[0], head[1] - pad - offset[1]))
+
+def draw_food(food, t, offset=(0, 0)):
+    cx = food[0] * BLOCK_SIZE + BLOCK_SIZE // 2 - offset[0]
+    cy = food[1] * BLOCK_SIZE + BLOCK_SIZE // 2 - offset[1]
+    radius = food_radius(t)
+    orbs = get_sprites()["food"]
+    orb = orbs.get(radius)
+    if orb is None:
+        orb = orbs[radius] = render_orb(ORANGE, FOOD_GLOW, radius)
+    screen.blit(orb, (cx - BLOCK_SIZE * 3 // 2, cy - BLOCK_SIZE * 3 // 2))
     # Orbiting sparkle
     orbit = int(BLOCK_SIZE * 0.55)
     sx = int(cx + orbit * math.cos(t * 5))
     sy = int(cy + orbit * math.sin(t * 5))
     pygame.draw.circle(screen, WHITE, (sx, sy), max(2, radius // 4))
-    pygame.draw.circle(screen, WHITE, (cx - 3, cy - 3), max(2, radius // 3))
 
-def draw_powerup(powerup, t):
+def draw_powerup(powerup, t, offset=(0, 0)):
     if not powerup:
         return
     kind, pos = powerup["kind"], powerup["pos"]
-    cx = pos[0] + BLOCK_SIZE // 2
-    cy = pos[1] + BLOCK_SIZE // 2
-    pulse = 1.0 + 0.15 * math.sin(t * 6 + 1.2)
-    radius = int((BLOCK_SIZE // 2 - 3) * pulse)
-    color = POWERUP_COLORS.get(kind, WHITE)
-    glow = pygame.Surface((BLOCK_SIZE * 3, BLOCK_SIZE * 3), pygame.SRCALPHA)
-    pygame.draw.circle(glow, (*color, 110), (BLOCK_SIZE * 3 // 2, BLOCK_SIZE * 3 // 2), BLOCK_SIZE)
-    screen.blit(glow, (cx - BLOCK_SIZE * 3 // 2, cy - BLOCK_SIZE * 3 // 2))
-    pygame.draw.circle(screen, color, (cx, cy), radius)
-    pygame.draw.circle(screen, WHITE, (cx - 3, cy - 3), max(2, radius // 3))
-
-def spawn_powerup(snake, hurdles, food):
-    max_x, max_y = grid_limits()
-    occupied = set(snake) | set(hurdles)
-    if food:
-        occupied.add(food)
-    kinds = ["slow", "magnet", "shield", "double"]
-    while True:
-        pos = (random.randrange(0, max_x, BLOCK_SIZE),
-               random.randrange(0, max_y, BLOCK_SIZE))
-        if pos not in occupied:
-            return {"kind": random.choice(kinds), "pos": pos}
-
-def grid_limits():
-    max_x = (WIDTH // BLOCK_SIZE) * BLOCK_SIZE
-    max_y = (HEIGHT // BLOCK_SIZE) * BLOCK_SIZE
-    return max_x, max_y
-
-def spawn_food(snake, hurdles):
-    max_x, max_y = grid_limits()
-    occupied = set(snake) | set(hurdles)
-    while True:
-        food = (random.randrange(0, max_x, BLOCK_SIZE),
-                random.randrange(0, max_y, BLOCK_SIZE))
-        if food not in occupied:
-            return food
-
-def generate_hurdles(mode_name, avoid_positions):
-    if mode_name == "MEDIUM":
-        count = 8
-    elif mode_name == "HARD":
-        count = 24
-    else:
+    cx = pos[0] * BLOCK_SIZE + BLOCK_SIZE // 2 - offset[0]
+    cy = pos[1] * BLOCK_SIZE + BLOCK_SIZE // 2 - offset[1]
+    radius = powerup_radius(t)
+    orbs = get_sprites()["powerup"]
+    orb = orbs.get((kind, radius))
+    if orb is None:
+        color = POWERUP_COLORS.get(kind, WHITE)
+        orb = orbs[(kind, radius)] = render_orb(color, (*color, 110), radius)
+    screen.blit(orb, (cx - BLOCK_SIZE * 3 // 2, cy - BLOCK_SIZE * 3 // 2))
+
+def draw_hurdle(h, offset=(0, 0)):
+    rect = (h[0] * BLOCK_SIZE - offset[0], h[1] * BLOCK_SIZE - offset[1], BLOCK_SIZE, BLOCK_SIZE)
+    pygame.draw.rect(screen, BLUE, rect, border_radius=6)
+    pygame.draw.rect(screen, WHITE, rect, 1, border_radius=6)
+
+def cell_rect(pos, pad=0):
+    return pygame.Rect(pos[0] * BLOCK_SIZE - pad, pos[1] * BLOCK_SIZE - pad,
+                       BLOCK_SIZE + pad * 2, BLOCK_SIZE + pad * 2)
+
+def snake_rects(snake, tail=None):
+    if not snake:
         return []
-    max_x, max_y = grid_limits()
-    hurdles = set()
-    avoid = set(avoid_positions)
-    while len(hurdles) < count:
-        pos = (random.randrange(0, max_x, BLOCK_SIZE),
-               random.randrange(0, max_y, BLOCK_SIZE))
-        if pos not in avoid:
-            hurdles.add(pos)
-    return list(hurdles)
-
-def load_high_score():
-    try:
-        with open(HIGH_SCORE_FILE, "r") as f:
-            return int(f.read().strip() or 0)
-    except (FileNotFoundError, ValueError):
-        return 0
+    # Head glow and tongue reach past the cell; body segments wiggle by up to 2px.
+    # Each rect also covers the cell the segment is sliding in from.
+    pad = sprite_pad()
+    rects = [cell_rect(snake[0], pad)]
+    if len(snake) > 1:
+        rects[0].union_ip(cell_rect(snake[1], pad))
+    previous = islice(snake, 2, None)
+    for segment in islice(snake, 1, None):
+        rect = cell_rect(segment, 2)
+        rect.union_ip(cell_rect(next(previous, tail or segment), 2))
+        rects.append(rect)
+    return rects
 
-def save_high_score(score):
-    try:
-        with open(HIGH_SCORE_FILE, "w") as f:
-            f.write(str(score))
-    except OSError:
-        pass
+def request_full_repaint():
+    dirty_state["full"] = True
+
+def draw_playing(snake, food, powerup, hurdles, hud, buttons, mouse_pos, t, alpha=1.0, tail=None):
+    # Overlays are drawn above the moving sprites, in this order
+    overlays = {}
+    for h in hurdles:
+        overlays[("hurdle", h)] = (h, cell_rect(h), draw_hurdle, (h,))
+    for text, text_font, color, x, y in hud:
+        rect = pygame.Rect((x, y), text_cache.render(text_font, text, color).get_size())
+        overlays[("hud", x, y)] = ((text, color), rect, draw_text, (text, text_font, color, x, y))
+    for name, label in (("pause", "Pause"), ("menu", "Menu")):
+        rect = buttons[name]
+        hover = rect.collidepoint(mouse_pos)
+        overlays[("button", name)] = ((label, hover), rect, draw_button, (rect, label, False, hover))
+    sprites = snake_rects(snake, tail) + [cell_rect(food, BLOCK_SIZE)]
+    if powerup:
+        sprites.append(cell_rect(powerup["pos"], BLOCK_SIZE))
+    effects = particles.bounds()
+    if effects:
+        sprites.append(effects)
+
+    # Fetched first: swapping in a new background asks for a full repaint
+    background = get_background()
+    if not DIRTY_RECTS or dirty_state["full"]:
+        draw_background()
+        profiler.mark("background")
+        draw_snake(snake, t, alpha, tail)
+        profiler.mark("snake")
+        draw_food(food, t)
+        profiler.mark("food")
+        draw_powerup(powerup, t)
+        profiler.mark("powerup")
+        particles.draw(screen)
+        profiler.mark("particles")
+        for name, (_, _, draw, args) in overlays.items():
+            draw(*args)
+            profiler.mark(OVERLAY_PHASES[name[0]])
+        pygame.display.update()
+        profiler.mark("present")
+    else:
+        dirty = dirty_state["sprites"] + sprites
+        previous = dirty_state["overlays"]
+        for name, (key, rect, _, _) in overlays.items():
+            old = previous.get(name)
+            if old is None or old[0] != key:
+                dirty.append(rect)
+                if old:
+                    dirty.append(old[1])
+        for name, (_, rect) in previous.items():
+            if name not in overlays:
+                dirty.append(rect)
+
+        # Restoring a dirty area wipes any overlay on top of it, which in turn
+        # makes that overlay's whole rect dirty
+        pending = list(overlays)
+        redraw = set()
+        grew = True
+        while grew:
+            grew = False
+            for name in pending:
+                if name not in redraw and overlays[name][1].collidelist(dirty) != -1:
+                    redraw.add(name)
+                    dirty.append(overlays[name][1])
+                    grew = True
+
+        bounds = screen.get_rect()
+        dirty = [rect.clip(bounds) for rect in dirty]
+        for rect in dirty:
+            screen.blit(background, rect, rect)
+        profiler.mark("background")
+        draw_snake(snake, t, alpha, tail)
+        profiler.mark("snake")
+        draw_food(food, t)
+        profiler.mark("food")
+        draw_powerup(powerup, t)
+        profiler.mark("powerup")
+        particles.draw(screen)
+        profiler.mark("particles")
+        for name in pending:
+            if name in redraw:
+                _, _, draw, args = overlays[name]
+                draw(*args)
+                profiler.mark(OVERLAY_PHASES[name[0]])
+        pygame.display.update(dirty)
+        profiler.mark("present")
+
+    dirty_state["full"] = False
+    dirty_state["sprites"] = sprites
+    dirty_state["overlays"] = {name: (item[0], item[1]) for name, item in overlays.items()}
+
+# ---------------- EFFECTS ----------------
+def cell_center(pos):
+    return (pos[0] * BLOCK_SIZE + BLOCK_SIZE // 2, pos[1] * BLOCK_SIZE + BLOCK_SIZE // 2)
+
+def emit_effects(sim, events, powerup):
+    # After each tick: bursts for what happened in it, and a trail while slow or magnet is on.
+    # powerup is the one that was on the board before the tick
+    if not particles:
+        return
+    x, y = cell_center(sim.snake[0])
+    if "ate" in events:
+        particles.emit(x, y, 24, ORANGE, speed=140.0, life=0.5)
+        particles.emit(x, y, 8, ACCENT, speed=80.0, life=0.7)
+    if "powerup" in events:
+        particles.emit(x, y, 48, POWERUP_COLORS.get(powerup["kind"], WHITE), speed=180.0, life=0.8)
+    if "shield" in events:
+        # The head stayed put; the shield breaks where it would have hit
+        dx, dy = DIRECTIONS[sim.direction]
+        particles.emit(x + dx * BLOCK_SIZE // 2, y + dy * BLOCK_SIZE // 2, 64, POWERUP_COLORS["shield"],
+                       speed=220.0, life=0.6)
+    if sim.moved and len(sim.snake) > 1:
+        for kind in ("slow", "magnet"):
+            if sim.active[kind] > 0:
+                nx, ny = cell_center(sim.snake[1])
+                particles.emit(nx, ny, 4, POWERUP_COLORS[kind], speed=25.0, life=0.9, jitter=BLOCK_SIZE * 0.6)
+
+# ---------------- WORLD VIEW ----------------
+# With --world the board is bigger than the window and a camera follows the
+# head. Only what is in view is drawn: the grid is one cached tile shifted by
+# the camera's sub-cell offset, hurdles come from the chunks in view, and a
+# snake longer than the view is found by scanning the visible cells instead of
+# walking its body.
+WORLD_CHUNK = 16
+GRID_KEY = (0, 0, 0)
+world_cache = {"key": None, "view": None, "backdrop": None, "stretched": False, "grid": None}
+hurdle_index = {"source": None, "count": 0, "chunks": {}}
+
+def get_world_layers():
+    key = (WIDTH, HEIGHT, BLOCK_SIZE)
+    if world_cache["key"] != key:
+        # One cell bigger than the window so any sub-cell offset still covers it
+        grid = pygame.Surface((WIDTH + BLOCK_SIZE, HEIGHT + BLOCK_SIZE)).convert()
+        grid.fill(GRID_KEY)
+        grid.set_colorkey(GRID_KEY, pygame.RLEACCEL)
+        draw_grid(grid, WIDTH + BLOCK_SIZE, HEIGHT + BLOCK_SIZE, BLOCK_SIZE)
+        world_cache.update(key=key, view=None, grid=grid)
+    if world_cache["view"] is None or world_cache["stretched"] and not resizing():
+        world_cache["view"], world_cache["stretched"] = get_backdrop(world_cache, WIDTH, HEIGHT)
+    return world_cache["view"], world_cache["grid"]
+
+def world_camera(focus, cols, rows):
+    # Top-left world pixel of the view, centred on focus but kept inside the
+    # world; along an axis where the world is smaller than the window it is centred
+    world_w, world_h = cols * BLOCK_SIZE, rows * BLOCK_SIZE
+    x = focus[0] + BLOCK_SIZE // 2 - WIDTH // 2
+    y = focus[1] + BLOCK_SIZE // 2 - HEIGHT // 2
+    x = min(max(0, x), world_w - WIDTH) if world_w > WIDTH else -((WIDTH - world_w) // 2)
+    y = min(max(0, y), world_h - HEIGHT) if world_h > HEIGHT else -((HEIGHT - world_h) // 2)
+    return x, y
+
+def visible_cells(camera, cols, rows):
+    # Cell bounds (col0, row0, col1, row1) of the view, one cell of margin for glows and wiggle
+    x, y = camera
+    return (max(0, x // BLOCK_SIZE - 1), max(0, y // BLOCK_SIZE - 1),
+            min(cols, (x + WIDTH) // BLOCK_SIZE + 2), min(rows, (y + HEIGHT) // BLOCK_SIZE + 2))
+
+def visible_hurdles(hurdles, view):
+    # Hurdles bucketed into WORLD_CHUNK-cell chunks, rebuilt whenever the list changes
+    if hurdle_index["source"] is not hurdles or hurdle_index["count"] != len(hurdles):
+        chunks = {}
+        for h in hurdles:
+            chunks.setdefault((h[0] // WORLD_CHUNK, h[1] // WORLD_CHUNK), []).append(h)
+        hurdle_index.update(source=hurdles, count=len(hurdles), chunks=chunks)
+    col0, row0, col1, row1 = view
+    chunks = hurdle_index["chunks"]
+    for cy in range(row0 // WORLD_CHUNK, (row1 - 1) // WORLD_CHUNK + 1):
+        for cx in range(col0 // WORLD_CHUNK, (col1 - 1) // WORLD_CHUNK + 1):
+            for h in chunks.get((cx, cy), ()):
+                if col0 <= h[0] < col1 and row0 <= h[1] < row1:
+                    yield h
+
+def draw_world_snake(sim, t, alpha, camera, view):
+    snake = sim.snake
+    col0, row0, col1, row1 = view
+    if len(snake) <= (col1 - col0) * (row1 - row0):
+        draw_snake(snake, t, alpha, sim.last_tail, camera)
+        return
+    head = snake_positions(list(islice(snake, 2)), alpha, sim.last_tail)[0]
+    draw_snake_head(snake, head, t, camera)
+    draw_visible_body(sim, t, alpha, camera, view)
+
+def draw_visible_body(sim, t, alpha, camera, view):
+    # Body segments found from the grid rather than the snake. A cell's segment
+    # index is how many moves ago the head entered it, and while sliding it comes
+    # from the cell of the segment behind it, entered one move earlier.
+    col0, row0, col1, row1 = view
+    grid, entered, cols, rows = sim.grid, sim.entered, sim.cols, sim.rows
+    moves = sim.moves
+    last = len(sim.snake) - 1
+    segments = []
+    for row in range(row0, row1):
+        base = row * cols
+        for col, flags in enumerate(grid[base + col0:base + col1], start=col0):
+            if flags & BODY:
+                i = moves - entered[base + col]
+                if i:
+                    segments.append((i, col, row))
+    segments.sort()
+
+    body = get_sprites()["body"]
+    ox, oy = camera
+    blits = []
+    for i, x, y in segments:
+        if alpha >= 1.0:
+            sx, sy = x * BLOCK_SIZE, y * BLOCK_SIZE
+        else:
+            if i == last:
+                px, py = sim.last_tail or (x, y)
+            else:
+                px, py = x, y
+                before = moves - i - 1
+                for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                    if (0 <= nx < cols and 0 <= ny < rows and grid[ny * cols + nx] & BODY
+                            and entered[ny * cols + nx] == before):
+                        px, py = nx, ny
+                        break
+            sx = round((px + (x - px) * alpha) * BLOCK_SIZE)
+            sy = round((py + (y - py) * alpha) * BLOCK_SIZE)
+        wiggle = int(2 * math.sin(t * 5 + i * 0.6))
+        blits.append((body[i % 2], (sx + wiggle - ox, sy - wiggle - oy)))
+    screen.blits(blits, doreturn=False)
+
+def render_world(sim, t, alpha=1.0):
+    backdrop, grid_tile = get_world_layers()
+    focus = snake_positions(list(islice(sim.snake, 2)), alpha, sim.last_tail)[0]
+    camera = world_camera(focus, sim.cols, sim.rows)
+    view = visible_cells(camera, sim.cols, sim.rows)
+    cam_x, cam_y = camera
+
+    screen.blit(backdrop, (0, 0))
+    world = pygame.Rect(-cam_x, -cam_y, sim.cols * BLOCK_SIZE, sim.rows * BLOCK_SIZE)
+    area = world.clip(screen.get_rect())
+    screen.blit(grid_tile, area, area.move(cam_x % BLOCK_SIZE, cam_y % BLOCK_SIZE))
+    pygame.draw.rect(screen, ACCENT, world, 3)
+    profiler.mark("background")
+    draw_world_snake(sim, t, alpha, camera, view)
+    profiler.mark("snake")
+    col0, row0, col1, row1 = view
+    if sim.food and col0 - 1 <= sim.food[0] <= col1 and row0 - 1 <= sim.food[1] <= row1:
+        draw_food(sim.food, t, camera)
+    profiler.mark("food")
+    if sim.powerup and col0 - 1 <= sim.powerup["pos"][0] <= col1 and row0 - 1 <= sim.powerup["pos"][1] <= row1:
+        draw_powerup(sim.powerup, t, camera)
+    profiler.mark("powerup")
+    particles.draw(screen, camera)
+    profiler.mark("particles")
+    for h in visible_hurdles(sim.hurdles, view):
+        draw_hurdle(h, camera)
+    profiler.mark("hurdles")
+
+def draw_world(sim, hud, buttons, mouse_pos, t, alpha=1.0):
+    # The camera moves every frame, so the world view always repaints the whole window
+    render_world(sim, t, alpha)
+    for text, text_font, color, x, y in hud:
+        draw_text(text, text_font, color, x, y)
+    for name, label in (("pause", "Pause"), ("menu", "Menu")):
+        draw_button(buttons[name], label, is_hover=buttons[name].collidepoint(mouse_pos))
+    profiler.mark("hud")
+    pygame.display.update()
+    profiler.mark("present")
+
+def grid_size():
+    return WIDTH // BLOCK_SIZE, HEIGHT // BLOCK_SIZE
 
 def update_high_score(score, high_score):
-    if score > high_score:
-        high_score = score
-        save_high_score(high_score)
-    return high_score
+    # In memory only; finished games are persisted through the ScoreStore
+    return max(score, high_score)
 
-def exit_game():
+def exit_game(scores=None):
+    if scores:
+        scores.close()
+    profiler.close()
     pygame.quit()
     sys.exit()
 
-def game_over_screen(score, level, high_score, mouse_pos, buttons):
+def game_over_screen(score, level, high_score, mouse_pos, buttons, won=False):
     draw_background()
-    draw_grid()
-    draw_border()
-    draw_centered("GAME OVER", big_font, RED, HEIGHT // 2 - 140)
+    if won:
+        draw_centered("YOU WIN", big_font, YELLOW, HEIGHT // 2 - 140)
+    else:
+        draw_centered("GAME OVER", big_font, RED, HEIGHT // 2 - 140)
     draw_centered(f"Score: {score}", font, WHITE, HEIGHT // 2 - 30)
     draw_centered(f"High Score: {high_score}", font, ACCENT, HEIGHT // 2 + 10)
     draw_centered(f"Level: {level}", font, WHITE, HEIGHT // 2 + 50)
@@ -273,10 +809,8 @@ def game_over_screen(score, level, high_score, mouse_pos, buttons):
     draw_button(buttons["over_quit"], "Quit", is_active=False, is_hover=buttons["over_quit"].collidepoint(mouse_pos))
     pygame.display.update()
 
-def start_screen(high_score, mode_name, mouse_pos, buttons):
+def start_screen(high_score, mode_name, mouse_pos, buttons, autopilot=False):
     draw_background()
-    draw_grid()
-    draw_border()
     draw_centered("SNAKE", big_font, YELLOW, 50)
 
     mode_info = {
@@ -298,7 +832,8 @@ def start_screen(high_score, mode_name, mouse_pos, buttons):
             220,
         )
     draw_panel(info_panel, title="Mode Details")
-    draw_text(f"Selected: {mode_name}", font, WHITE, info_panel.left + 20, info_panel.top + 60)
+    draw_text(f"Selected: {mode_name}{' + AUTO' if autopilot else ''}", font, WHITE,
+              info_panel.left + 20, info_panel.top + 60)
     lines = mode_info.get(mode_name, [])
     for i, line in enumerate(lines):
         draw_text(f"- {line}", font, WHITE, info_panel.left + 20, info_panel.top + 100 + i * 34)
@@ -316,6 +851,7 @@ def start_screen(high_score, mode_name, mouse_pos, buttons):
             is_active=(name == mode_name),
             is_hover=rect.collidepoint(mouse_pos),
         )
+    draw_button(buttons["auto"], "AUTO", is_active=autopilot, is_hover=buttons["auto"].collidepoint(mouse_pos))
     draw_button(buttons["start"], "Start", is_active=False, is_hover=buttons["start"].collidepoint(mouse_pos))
     draw_button(buttons["help"], "How To Play", is_active=False, is_hover=buttons["help"].collidepoint(mouse_pos))
     draw_button(buttons["quit"], "Quit", is_active=False, is_hover=buttons["quit"].collidepoint(mouse_pos))
@@ -323,8 +859,6 @@ def start_screen(high_score, mode_name, mouse_pos, buttons):
 
 def help_screen(mouse_pos, buttons):
     draw_background()
-    draw_grid()
-    draw_border()
     panel = pygame.Rect(120, 120, WIDTH - 240, HEIGHT - 260)
     draw_panel(panel, title="How To Play")
     text_y = panel.top + 70
@@ -333,39 +867,120 @@ def help_screen(mouse_pos, buttons):
     draw_text("Avoid walls, your tail, and obstacles.", font, WHITE, panel.left + 30, text_y + 80)
     draw_text("Use Pause/Resume buttons to control the game.", font, WHITE, panel.left + 30, text_y + 120)
     draw_text("Choose a mode on the main menu.", font, WHITE, panel.left + 30, text_y + 160)
+    draw_text("Turn on AUTO to let the snake steer itself.", font, WHITE, panel.left + 30, text_y + 200)
     draw_button(buttons["back"], "Back", is_active=False, is_hover=buttons["back"].collidepoint(mouse_pos))
     pygame.display.update()
 
-def main():
-    global WIDTH, HEIGHT, screen
+def paused_screen(sim, high_score, mouse_pos, buttons, world=False):
+    t = time.perf_counter() - IMPORT_TIME
+    if world:
+        render_world(sim, t)
+    else:
+        draw_background()
+        draw_snake(sim.snake, t)
+        draw_food(sim.food, t)
+        draw_powerup(sim.powerup, t)
+    draw_text(f"Score: {sim.score}", font, WHITE, 12, 10)
+    draw_text(f"High: {high_score}", font, ACCENT, 12, 40)
+    draw_text(f"Level: {sim.level}", font, WHITE, 12, 70)
+    draw_centered("PAUSED", big_font, BLUE, HEIGHT // 2 - 30)
+    draw_button(buttons["resume"], "Resume", is_active=False, is_hover=buttons["resume"].collidepoint(mouse_pos))
+    draw_button(buttons["menu"], "Menu", is_active=False, is_hover=buttons["menu"].collidepoint(mouse_pos))
+    pygame.display.update()
 
-    difficulty = {
-        "EASY": {"speed": 8, "level_step": 60, "speed_step": 2},
-        "MEDIUM": {"speed": 10, "level_step": 50, "speed_step": 3},
-        "HARD": {"speed": 13, "level_step": 40, "speed_step": 4},
-    }
+def wait_events(timeout_ms):
+    # Sleep until the next event or the timeout (0 = no timeout), then drain the queue
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
-    def reset_game():
-        snake = [(100, 100), (80, 100), (60, 100)]
-        hurdles = generate_hurdles(mode_name, snake)
-        direction = "RIGHT"
-        food = spawn_food(snake, hurdles)
-        score = 0
-        level = 1
-        speed = difficulty[mode_name]["speed"]
-        powerup = None
-        last_powerup_score = -1
-        active = {"slow": 0.0, "magnet": 0.0, "shield": 0.0, "double": 0.0}
-        return snake, direction, food, score, level, speed, hurdles, powerup, active, last_powerup_score
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Snake Game")
+    parser.add_argument(
+        "--profile", nargs="?", const=PROFILE_FILE, default=os.environ.get("SNAKE_PROFILE"),
+        metavar="PATH",
+        help="record per-phase frame timings and write them to PATH (.csv or .json) on exit; "
+             "F3 toggles the timing overlay",
+    )
+    parser.add_argument(
+        "--record", metavar="DIR", default=os.environ.get("SNAKE_RECORD"),
+        help="save a replay of every game to DIR",
+    )
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded game instead of reading the keyboard")
+    parser.add_argument(
+        "--world", metavar="COLSxROWS", type=parse_size,
+        help="play on a board of this many cells, independent of the window, with a camera following the snake",
+    )
+    return parser.parse_args(argv)
+
+def main(args=None):
+    global WIDTH, HEIGHT, screen, profiler
+    if args is None:
+        args = parse_args([])
+    if args.profile:
+        os.makedirs(os.path.dirname(os.path.abspath(args.profile)), exist_ok=True)
+        profiler = FrameProfiler(output=args.profile)
+    if screen is None:
+        init()
 
     mode_name = "MEDIUM"
-    high_score = load_high_score()
-    snake, direction, food, score, level, speed, hurdles, powerup, active, last_powerup_score = reset_game()
+    scores = ScoreStore(HIGH_SCORE_FILE)
+    def board_size():
+        return args.world or grid_size()
+
+    sim = SnakeSim(*board_size(), mode=mode_name)
+    autopilot = None
+    turns = TurnQueue()
+    recorder = None
+    try:
+        player = Player(Recording.load(args.replay)) if args.replay else None
+    except (OSError, ReplayError) as e:
+        sys.exit(f"Cannot play {args.replay}: {e}")
+    if player:
+        mode_name = player.recording.mode
+    elif args.record:
+        os.makedirs(args.record, exist_ok=True)
+    high_score = scores.high_score(mode_name)
+
+    def reset_game():
+        nonlocal recorder
+        particles.clear()
+        if player:
+            player.restart(sim)
+            return
+        sim.cols, sim.rows = board_size()
+        sim.reset(random.getrandbits(32), mode_name)
+        turns.clear()
+        if autopilot:
+            autopilot.reset()
+        if args.record:
+            recorder = Recorder(sim)
+
+    def end_game(finished=True):
+        # Finished games go on the leaderboard; finished or abandoned, the replay is kept
+        nonlocal recorder
+        if player:
+            if finished:
+                rec = player.recording
+                result = "matches" if (sim.score, sim.ticks) == (rec.score, rec.ticks) else "DOES NOT match"
+                print(f"Replay {result}: recorded {rec.score} in {rec.ticks} ticks, "
+                      f"replayed {sim.score} in {sim.ticks}")
+            return
+        if finished and not autopilot:
+            scores.submit(mode_name, sim.score)
+        if recorder:
+            recording = recorder.finish(sim)
+            recorder = None
+            try:
+                recording.save(recording_path(args.record, recording))
+            except OSError as e:
+                print(f"Could not save replay: {e}")
 
     def build_buttons():
-        button_w, button_h = 160, 50
-        gap = 20
-        total_w = button_w * 3 + gap * 2
+        button_w, button_h = 125, 50
+        gap = 14
+        total_w = button_w * 4 + gap * 3
         pause_w, pause_h = 110, 36
         menu_w, menu_h = 90, 36
         stack_h = 55
@@ -386,6 +1001,7 @@ def main():
                 "MEDIUM": pygame.Rect(start_x + button_w + gap, mode_y, button_w, button_h),
                 "HARD": pygame.Rect(start_x + (button_w + gap) * 2, mode_y, button_w, button_h),
             },
+            "auto": pygame.Rect(start_x + (button_w + gap) * 3, mode_y, button_w, button_h),
             "start": pygame.Rect((WIDTH - 220) // 2, stack_start_y, 220, stack_h),
             "help": pygame.Rect((WIDTH - 220) // 2, stack_start_y + stack_h + stack_gap, 220, stack_h),
             "quit": pygame.Rect((WIDTH - 220) // 2, stack_start_y + (stack_h + stack_gap) * 2, 220, stack_h),
@@ -399,59 +1015,87 @@ def main():
         }
 
     buttons = build_buttons()
+    last_frame = None
+    accumulator = 0.0
 
     running = True
     game_state = "START"  # START, HELP, PLAYING, PAUSED, GAME_OVER
+    if player:
+        reset_game()
+        game_state = "PLAYING"
+
+    def hovered_button(mouse_pos):
+        for name in SCREEN_BUTTONS[game_state]:
+            rects = buttons[name].items() if name == "modes" else [(name, buttons[name])]
+            for key, rect in rects:
+                if rect.collidepoint(mouse_pos):
+                    return key
+        return None
+
+    # Idle screens are repainted only when their state, the hovered button or
+    # the input changed, or when the pause screen's next animation frame is due
+    shown = None
+    dirty = True
+    next_frame = 0.0
+    pending_size = None
 
     while running:
-        if game_state == "START":
-            mouse_pos = pygame.mouse.get_pos()
-            start_screen(high_score, mode_name, mouse_pos, buttons)
-        elif game_state == "HELP":
-            mouse_pos = pygame.mouse.get_pos()
-            help_screen(mouse_pos, buttons)
-        elif game_state == "GAME_OVER":
+        profiler.begin_frame()
+        if game_state == "PLAYING":
+            events = pygame.event.get()
+        else:
             mouse_pos = pygame.mouse.get_pos()
-            game_over_screen(score, level, high_score, mouse_pos, buttons)
+            view = (game_state, hovered_button(mouse_pos))
+            now = time.perf_counter()
+            # A background stretched during a resize is replaced once the size settles
+            animating = game_state == "PAUSED" or background_cache["stretched"]
+            if dirty or view != shown or (animating and now >= next_frame):
+                if game_state == "START":
+                    start_screen(high_score, mode_name, mouse_pos, buttons, autopilot is not None)
+                elif game_state == "HELP":
+                    help_screen(mouse_pos, buttons)
+                elif game_state == "GAME_OVER":
+                    game_over_screen(sim.score, sim.level, high_score, mouse_pos, buttons, sim.won)
+                else:
+                    paused_screen(sim, high_score, mouse_pos, buttons, args.world)
+                shown = view
+                dirty = False
+                next_frame = now + 1.0 / IDLE_ANIMATION_FPS
+                report_startup()
+            timeout = max(1, int((next_frame - now) * 1000)) if animating else 0
+            events = wait_events(timeout)
+        event_time = time.perf_counter()
 
-        for event in pygame.event.get():
+        for event in events:
+            if event.type != pygame.MOUSEMOTION:
+                dirty = True
             if event.type == pygame.QUIT:
-                exit_game()
+                if game_state in ("PLAYING", "PAUSED"):
+                    end_game(finished=False)
+                exit_game(scores)
             elif event.type == pygame.VIDEORESIZE:
-                new_w = max(MIN_WIDTH, event.w)
-                new_h = max(MIN_HEIGHT, event.h)
-                WIDTH, HEIGHT = new_w, new_h
-                screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-                buttons = build_buttons()
-                hurdles = [h for h in hurdles if 0 <= h[0] < WIDTH and 0 <= h[1] < HEIGHT]
-                if not (0 <= food[0] < WIDTH and 0 <= food[1] < HEIGHT):
-                    food = spawn_food(snake, hurdles)
-                if powerup and not (0 <= powerup["pos"][0] < WIDTH and 0 <= powerup["pos"][1] < HEIGHT):
-                    powerup = None
-                if any(seg[0] < 0 or seg[0] >= WIDTH or seg[1] < 0 or seg[1] >= HEIGHT for seg in snake):
-                    game_state = "GAME_OVER"
+                # Dragging an edge sends a stream of these; only the last one counts
+                pending_size = (event.w, event.h)
             elif event.type == pygame.KEYDOWN:
-                if game_state == "PLAYING":
-                    if event.key == pygame.K_UP and direction != "DOWN":
-                        direction = "UP"
-                    elif event.key == pygame.K_DOWN and direction != "UP":
-                        direction = "DOWN"
-                    elif event.key == pygame.K_LEFT and direction != "RIGHT":
-                        direction = "LEFT"
-                    elif event.key == pygame.K_RIGHT and direction != "LEFT":
-                        direction = "RIGHT"
+                if event.key == pygame.K_F3 and profiler:
+                    profiler.show_overlay = not profiler.show_overlay
+                if game_state == "PLAYING" and event.key in KEY_DIRECTIONS and not (player or autopilot):
+                    turns.push(KEY_DIRECTIONS[event.key], sim.direction, event_time)
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if game_state == "START":
                     for name, rect in buttons["modes"].items():
                         if rect.collidepoint(event.pos):
                             mode_name = name
+                            high_score = scores.high_score(mode_name)
+                    if buttons["auto"].collidepoint(event.pos):
+                        autopilot = None if autopilot else Autopilot()
                     if buttons["start"].collidepoint(event.pos):
-                        snake, direction, food, score, level, speed, hurdles, powerup, active, last_powerup_score = reset_game()
+                        reset_game()
                         game_state = "PLAYING"
                     elif buttons["help"].collidepoint(event.pos):
                         game_state = "HELP"
                     elif buttons["quit"].collidepoint(event.pos):
-                        exit_game()
+                        exit_game(scores)
                 elif game_state == "HELP":
                     if buttons["back"].collidepoint(event.pos):
                         game_state = "START"
@@ -459,134 +1103,114 @@ def main():
                     if buttons["pause"].collidepoint(event.pos):
                         game_state = "PAUSED"
                     elif buttons["menu"].collidepoint(event.pos):
+                        end_game(finished=False)
                         game_state = "START"
                 elif game_state == "PAUSED":
                     if buttons["resume"].collidepoint(event.pos):
                         game_state = "PLAYING"
                     elif buttons["menu"].collidepoint(event.pos):
+                        end_game(finished=False)
                         game_state = "START"
                 elif game_state == "GAME_OVER":
                     if buttons["over_restart"].collidepoint(event.pos):
-                        snake, direction, food, score, level, speed, hurdles, powerup, active, last_powerup_score = reset_game()
+                        reset_game()
                         game_state = "PLAYING"
                     elif buttons["over_menu"].collidepoint(event.pos):
                         game_state = "START"
                     elif buttons["over_quit"].collidepoint(event.pos):
-                        exit_game()
+                        exit_game(scores)
 
-        if game_state == "PAUSED":
-            mouse_pos = pygame.mouse.get_pos()
-            t = pygame.time.get_ticks() / 1000.0
-            draw_background()
-            draw_grid()
-            draw_border()
-            draw_snake(snake, t)
-            draw_food(food, t)
-            draw_powerup(powerup, t)
-            draw_text(f"Score: {score}", font, WHITE, 12, 10)
-            draw_text(f"High: {high_score}", font, ACCENT, 12, 40)
-            draw_text(f"Level: {level}", font, WHITE, 12, 70)
-            draw_centered("PAUSED", big_font, BLUE, HEIGHT // 2 - 30)
-            draw_button(buttons["resume"], "Resume", is_active=False, is_hover=buttons["resume"].collidepoint(mouse_pos))
-            draw_button(buttons["menu"], "Menu", is_active=False, is_hover=buttons["menu"].collidepoint(mouse_pos))
-            pygame.display.update()
-            clock.tick(10)
-            continue
-        elif game_state != "PLAYING":
-            clock.tick(10)
-            continue
+        if pending_size:
+            WIDTH, HEIGHT = max(MIN_WIDTH, pending_size[0]), max(MIN_HEIGHT, pending_size[1])
+            pending_size = None
+            screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
+            live_resize["until"] = time.perf_counter() + RESIZE_SETTLE
+            request_full_repaint()
+            buttons = build_buttons()
+            # Replayed and world boards do not follow the window
+            if not (player or args.world):
+                if not sim.resize(*grid_size()):
+                    if game_state in ("PLAYING", "PAUSED"):
+                        end_game()
+                        game_state = "GAME_OVER"
+                elif recorder:
+                    recorder.resized(sim)
 
-        # Move snake
-        x, y = snake[0]
-        if direction == "UP":
-            y -= BLOCK_SIZE
-        elif direction == "DOWN":
-            y += BLOCK_SIZE
-        elif direction == "LEFT":
-            x -= BLOCK_SIZE
-        elif direction == "RIGHT":
-            x += BLOCK_SIZE
-
-        new_head = (x, y)
-
-        # Collision with walls or itself
-        if (x < 0 or x >= WIDTH or y < 0 or y >= HEIGHT or new_head in snake or new_head in hurdles):
-            if active["shield"] > 0:
-                # Consume shield instead of dying
-                active["shield"] = 0
-                game_state = "PLAYING"
-            else:
-                high_score = update_high_score(score, high_score)
-                game_state = "GAME_OVER"
+        profiler.mark("events")
+        if game_state != "PLAYING":
+            # Other screens paint the whole window
+            request_full_repaint()
+            last_frame = None
             continue
 
-        snake.insert(0, new_head)
-
-        # Food collision
-        if new_head == food:
-            points = 20 if active["double"] > 0 else 10
-            score += points
-            food = spawn_food(snake, hurdles)
-            high_score = update_high_score(score, high_score)
-
-            # Increase level every 50 points
-            if score % difficulty[mode_name]["level_step"] == 0:
-                level += 1
-                speed += difficulty[mode_name]["speed_step"]
-        else:
-            snake.pop()
-
-        # Powerup collection
-        if powerup and new_head == powerup["pos"]:
-            active[powerup["kind"]] = POWERUP_DURATION
-            powerup = None
-
-        # Magnet pulls food toward head by one tile
-        if active["magnet"] > 0:
-            hx, hy = snake[0]
-            fx, fy = food
-            if abs(hx - fx) + abs(hy - fy) <= BLOCK_SIZE * 6:
-                step_x = BLOCK_SIZE if fx < hx else -BLOCK_SIZE if fx > hx else 0
-                step_y = BLOCK_SIZE if fy < hy else -BLOCK_SIZE if fy > hy else 0
-                candidate = (fx + step_x, fy + step_y)
-                if candidate not in snake and candidate not in hurdles:
-                    food = candidate
-
-        # Tick active powerups and spawn new ones
-        dt = clock.get_time() / 1000.0
-        for k in active:
-            if active[k] > 0:
-                active[k] = max(0.0, active[k] - dt)
-        if powerup is None and score > 0 and score % POWERUP_SPAWN_SCORE_STEP == 0 and score != last_powerup_score:
-            powerup = spawn_powerup(snake, hurdles, food)
-            last_powerup_score = score
+        # ---------------- SIMULATION ----------------
+        # Fixed timestep: run however many ticks the elapsed time covers
+        now = time.perf_counter()
+        if last_frame is None:
+            last_frame = now
+            accumulator = 0.0
+        elapsed = now - last_frame
+        accumulator += elapsed
+        last_frame = now
+        ticks = 0
+        dropped = 0
+        replay_over = False
+        while sim.alive and accumulator >= 1.0 / sim.tick_rate():
+            accumulator -= 1.0 / sim.tick_rate()
+            if player and not player.before_step(sim):
+                replay_over = True
+                break
+            if autopilot and not player:
+                sim.turn(autopilot.decide(sim))
+            elif turns:
+                turns.apply(sim)
+            if recorder:
+                recorder.before_step(sim)
+            powerup = sim.powerup
+            events = sim.step()
+            emit_effects(sim, events, powerup)
+            if "ate" in events and not (autopilot or player):
+                high_score = update_high_score(sim.score, high_score)
+            ticks += 1
+            if ticks >= MAX_TICKS_PER_FRAME:
+                # Too far behind to catch up; drop the backlog instead of spiralling
+                dropped = int(accumulator * sim.tick_rate())
+                accumulator = 0.0
+        if not sim.alive or replay_over:
+            if not (autopilot or player):
+                high_score = update_high_score(sim.score, high_score)
+            end_game()
+            game_state = "GAME_OVER"
+            continue
+        alpha = min(1.0, accumulator * sim.tick_rate()) if sim.moved else 1.0
+        particles.update(elapsed)
+        profiler.mark("sim")
 
         # ---------------- DRAWING ----------------
         mouse_pos = pygame.mouse.get_pos()
-        t = pygame.time.get_ticks() / 1000.0
-        draw_background()
-        draw_grid()
-        draw_border()
-        draw_snake(snake, t)
-        draw_food(food, t)
-        draw_powerup(powerup, t)
-        for h in hurdles:
-            pygame.draw.rect(screen, BLUE, (*h, BLOCK_SIZE, BLOCK_SIZE), border_radius=6)
-            pygame.draw.rect(screen, WHITE, (*h, BLOCK_SIZE, BLOCK_SIZE), 1, border_radius=6)
-
-        draw_text(f"Score: {score}", font, WHITE, 12, 10)
-        draw_text(f"High: {high_score}", font, ACCENT, 12, 40)
-        draw_text(f"Level: {level}", font, WHITE, 12, 70)
-        draw_text(f"Mode: {mode_name}", font, WHITE, 12, 100)
-        active_list = [k for k, v in active.items() if v > 0]
+        t = time.perf_counter() - IMPORT_TIME
+        hud = [
+            (f"Score: {sim.score}", font, WHITE, 12, 10),
+            (f"High: {high_score}", font, ACCENT, 12, 40),
+            (f"Level: {sim.level}", font, WHITE, 12, 70),
+            (f"Mode: {mode_name}{' AUTO' if autopilot else ''}", font, WHITE, 12, 100),
+        ]
+        active_list = [k for k, v in sim.active.items() if v > 0]
         if active_list:
-            draw_text(f"Power: {', '.join(active_list)}", font, WHITE, 12, 130)
-        draw_button(buttons["pause"], "Pause", is_active=False, is_hover=buttons["pause"].collidepoint(mouse_pos))
-        draw_button(buttons["menu"], "Menu", is_active=False, is_hover=buttons["menu"].collidepoint(mouse_pos))
+            hud.append((f"Power: {', '.join(active_list)}", font, WHITE, 12, 130))
+        if profiler.show_overlay:
+            for i, line in enumerate(profiler.overlay_lines()):
+                hud.append((line, small_font, ACCENT, WIDTH - 330, 60 + i * 20))
+        if args.world:
+            draw_world(sim, hud, buttons, mouse_pos, t, alpha)
+        else:
+            draw_playing(sim.snake, sim.food, sim.powerup, sim.hurdles, hud, buttons, mouse_pos, t,
+                         alpha, sim.last_tail)
+        report_startup()
 
-        pygame.display.update()
-        speed_factor = 0.6 if active["slow"] > 0 else 1.0
-        clock.tick(speed * speed_factor)
+        profiler.end_frame(dropped)
+        clock.tick(RENDER_FPS)
 
 # ---------------- RUN GAME ----------------
-main()
+if __name__ == "__main__":
+    main(parse_args())
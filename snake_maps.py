@@ -0,0 +1,422 @@
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+
+from snake_files import CACHE_DIR, write_atomic
+
+# Hurdle layouts. A layout is a base pattern (scatter, corridors, rings or
+# maze) plus "growth": single-cell pillars that appear a few at a time as the
+# level goes up. Cells are flat indices (row * cols + col).
+#
+# Every free cell of a layout can be reached from every other one. The board
+# is cut into TILE x TILE tiles whose outer ring of cells is always left free,
+# so the rings of neighbouring tiles join up, and each tile is flood-filled
+# from its ring: pockets it cannot reach get a door cut into them, or are
+# filled in when only a cell or two. A pillar never has another hurdle among
+# its eight neighbours, and a cell like that can be blocked without cutting
+# anything off, so any set of pillars is safe too.
+#
+# Layouts depend only on board size, mode, variant and the cells kept clear
+# for the spawn, so they are built once and then read from MAP_DIR:
+#     python snake_maps.py 40x30 64x36 --check
+#     python snake_maps.py 40x30 --mode HARD --show 3
+
+MAP_VERSION = 1
+VARIANTS = 8
+TILE = 20
+# Tile patterns built per style and tile size; tiles pick from these
+TILE_POOL = 12
+# Levels' worth of growth worked out ahead of time
+GROWTH_LEVELS = 12
+MAP_DIR = os.path.join(CACHE_DIR, "maps")
+
+STYLES = ("scatter", "corridors", "rings", "maze")
+# Share of cells that are hurdles, before the per-style weight
+MAP_RULES = {
+    "MEDIUM": {"styles": ("scatter", "corridors"), "density": 0.012, "growth": 0.002},
+    "HARD": {"styles": STYLES, "density": 0.025, "growth": 0.004},
+}
+# Patterns made of walls look sparser than scattered blocks at the same count
+STYLE_WEIGHT = {"scatter": 1.0, "corridors": 2.0, "rings": 2.5, "maze": 2.5}
+
+HEADER = struct.Struct("<4sBHHBBBHIII")
+MAGIC = b"SNKM"
+
+class Layout:
+    def __init__(self, cols, rows, style, base, growth, per_level):
+        self.cols = cols
+        self.rows = rows
+        self.style = style
+        self.base = base      # array("I") of hurdle cells
+        self.growth = growth  # array("I") of pillars, in the order they appear
+        self.per_level = per_level
+
+    def hurdles(self):
+        cols = self.cols
+        return [(cell % cols, cell // cols) for cell in self.base]
+
+    def pillars(self, level):
+        # The pillars that appear on reaching this level
+        start = (level - 2) * self.per_level
+        if start < 0:
+            return []
+        cols = self.cols
+        return [(cell % cols, cell // cols) for cell in self.growth[start:start + self.per_level]]
+
+EMPTY_LAYOUT = Layout(0, 0, None, array("I"), array("I"), 0)
+
+# ---------------- CONNECTIVITY ----------------
+def neighbors(cell, w, h):
+    x, y = cell % w, cell // w
+    if x > 0:
+        yield cell - 1
+    if x < w - 1:
+        yield cell + 1
+    if y > 0:
+        yield cell - w
+    if y < h - 1:
+        yield cell + w
+
+def flood(blocked, w, h, starts, seen):
+    # Marks in seen every free cell reachable from starts; returns how many
+    queue = deque(cell for cell in starts if not blocked[cell] and not seen[cell])
+    for cell in queue:
+        seen[cell] = 1
+    count = 0
+    while queue:
+        cell = queue.popleft()
+        count += 1
+        for n in neighbors(cell, w, h):
+            if not blocked[n] and not seen[n]:
+                seen[n] = 1
+                queue.append(n)
+    return count
+
+def is_connected(blocked, w, h):
+    free = len(blocked) - sum(1 for b in blocked if b)
+    start = next((i for i, b in enumerate(blocked) if not b), None)
+    if start is None:
+        return True
+    return flood(blocked, w, h, [start], bytearray(len(blocked))) == free
+
+def ring(w, h):
+    return [c for c in range(w * h) if c % w in (0, w - 1) or c // w in (0, h - 1)]
+
+def connect(blocked, w, h, keep, starts, fill=True):
+    # Opens up (or with fill, fills in if tiny) every free pocket that cannot be reached from starts
+    while True:
+        seen = bytearray(w * h)
+        flood(blocked, w, h, starts, seen)
+        pocket_start = next((c for c in range(w * h) if not blocked[c] and not seen[c]), None)
+        if pocket_start is None:
+            return
+        pocket = bytearray(w * h)
+        size = flood(blocked, w, h, [pocket_start], pocket)
+        cells = [c for c in range(w * h) if pocket[c]]
+        if fill and size <= 2 and not any(keep[c] for c in cells):
+            for c in cells:
+                blocked[c] = 1
+            continue
+        # A door into the reachable part if there is one, otherwise any wall of the pocket
+        walls = [n for c in cells for n in neighbors(c, w, h) if blocked[n] and not keep[n]]
+        doors = [n for n in walls if any(seen[m] for m in neighbors(n, w, h))]
+        blocked[(doors or walls)[0]] = 0
+
+def open_pockets(grid, cols, rows, hurdle, start):
+    # For a board that lost cells: hurdle cells to clear so every non-hurdle cell
+    # is reachable from start again
+    blocked = bytearray(1 if flags & hurdle else 0 for flags in grid)
+    before = bytes(blocked)
+    connect(blocked, cols, rows, bytearray(len(grid)), [start], fill=False)
+    return [cell for cell in range(len(grid)) if before[cell] and not blocked[cell]]
+
+# ---------------- PATTERNS ----------------
+# Each fills the inside of a w x h tile, leaving its outer ring free, with
+# about target hurdle cells
+def pattern_scatter(blocked, w, h, target, rng):
+    cells = [y * w + x for y in range(1, h - 1) for x in range(1, w - 1)]
+    for cell in rng.sample(cells, min(target, len(cells))):
+        blocked[cell] = 1
+
+def pattern_corridors(blocked, w, h, target, rng):
+    # Parallel walls three cells apart, each with a two-cell gap
+    vertical = rng.random() < 0.5
+    across, along = (w, h) if vertical else (h, w)
+    placed = 0
+    for line in range(2 + rng.randrange(3), across - 2, 3):
+        gap = rng.randrange(1, along - 2)
+        for k in range(1, along - 1):
+            if gap <= k <= gap + 1:
+                continue
+            blocked[k * w + line if vertical else line * w + k] = 1
+            placed += 1
+        if placed >= target:
+            return
+
+def pattern_rings(blocked, w, h, target, rng):
+    # Rectangles sized to the target, each with a door on two opposite sides,
+    # kept a cell apart from each other
+    placed = 0
+    for _ in range(8):
+        if placed >= target:
+            return
+        side = max(4, (target - placed) // 4 + 1)
+        rw, rh = min(side + rng.randrange(-1, 2), w - 2), min(side + rng.randrange(-1, 2), h - 2)
+        if rw < 4 or rh < 4:
+            return
+        x0, y0 = rng.randrange(1, w - rw), rng.randrange(1, h - rh)
+        x1, y1 = x0 + rw - 1, y0 + rh - 1
+        if any(blocked[y * w + x] for y in range(max(1, y0 - 1), min(h - 1, y1 + 2))
+               for x in range(max(1, x0 - 1), min(w - 1, x1 + 2))):
+            continue
+        edge = [(x, y0) for x in range(x0, x1 + 1)] + [(x, y1) for x in range(x0, x1 + 1)]
+        edge += [(x0, y) for y in range(y0 + 1, y1)] + [(x1, y) for y in range(y0 + 1, y1)]
+        if rng.random() < 0.5:
+            doors = {(rng.randrange(x0 + 1, x1), y0), (rng.randrange(x0 + 1, x1), y1)}
+        else:
+            doors = {(x0, rng.randrange(y0 + 1, y1)), (x1, rng.randrange(y0 + 1, y1))}
+        for x, y in edge:
+            if (x, y) not in doors:
+                blocked[y * w + x] = 1
+                placed += 1
+
+def pattern_maze(blocked, w, h, target, rng):
+    # Walls of a maze on a 4-cell lattice, kept in random order until the target
+    cols, rows = (w - 2) // 4, (h - 2) // 4
+    if cols < 2 or rows < 2:
+        return pattern_scatter(blocked, w, h, target, rng)
+    # Carve a spanning tree; every lattice edge not carved is a wall
+    visited = {(0, 0)}
+    stack = [(0, 0)]
+    carved = set()
+    while stack:
+        a, b = stack[-1]
+        options = [(a + da, b + db) for da, db in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= a + da < cols and 0 <= b + db < rows and (a + da, b + db) not in visited]
+        if not options:
+            stack.pop()
+            continue
+        nxt = rng.choice(options)
+        carved.add(frozenset(((a, b), nxt)))
+        visited.add(nxt)
+        stack.append(nxt)
+    walls = []
+    for a in range(cols):
+        for b in range(rows):
+            if a + 1 < cols and frozenset(((a, b), (a + 1, b))) not in carved:
+                walls.append([(b * 4 + 1 + k) * w + a * 4 + 4 for k in range(4)])
+            if b + 1 < rows and frozenset(((a, b), (a, b + 1))) not in carved:
+                walls.append([(b * 4 + 4) * w + a * 4 + 1 + k for k in range(4)])
+    rng.shuffle(walls)
+    placed = 0
+    for wall in walls:
+        if placed >= target:
+            return
+        for cell in wall:
+            if not blocked[cell]:
+                blocked[cell] = 1
+                placed += 1
+
+PATTERNS = {
+    "scatter": pattern_scatter,
+    "corridors": pattern_corridors,
+    "rings": pattern_rings,
+    "maze": pattern_maze,
+}
+
+def tile_pattern(style, w, h, density, rng):
+    # Hurdle cells of one validated tile
+    blocked = bytearray(w * h)
+    if w >= 5 and h >= 5:
+        PATTERNS[style](blocked, w, h, round(w * h * density * STYLE_WEIGHT[style]), rng)
+        connect(blocked, w, h, bytearray(w * h), ring(w, h))
+    return [cell for cell in range(w * h) if blocked[cell]]
+
+# ---------------- BUILDING ----------------
+def build_layout(cols, rows, mode, variant, clear=()):
+    rules = MAP_RULES.get(mode)
+    if not rules:
+        return Layout(cols, rows, None, array("I"), array("I"), 0)
+    # Seeded from the arguments alone, so a layout comes out the same with or without the cache
+    rng = random.Random(f"{MAP_VERSION}:{cols}x{rows}:{mode}:{variant}")
+    style = rules["styles"][variant % len(rules["styles"])]
+    blocked = bytearray(cols * rows)
+    keep = bytearray(cols * rows)
+    for x, y in clear:
+        if x < cols and y < rows:
+            keep[y * cols + x] = 1
+
+    pools = {}
+    for ty in range(0, rows, TILE):
+        for tx in range(0, cols, TILE):
+            w, h = min(TILE, cols - tx), min(TILE, rows - ty)
+            if (w, h) not in pools:
+                pools[(w, h)] = [tile_pattern(style, w, h, rules["density"], rng) for _ in range(TILE_POOL)]
+            cells = rng.choice(pools[(w, h)])
+            if any(keep[(ty + y) * cols + tx + x] for y in range(h) for x in range(w)):
+                # Clear the spawn out of this tile and check it again
+                local = bytearray(w * h)
+                for cell in cells:
+                    local[cell] = 1
+                tile_keep = bytearray(keep[(ty + y) * cols + tx + x] for y in range(h) for x in range(w))
+                for cell in range(w * h):
+                    if tile_keep[cell]:
+                        local[cell] = 0
+                connect(local, w, h, tile_keep, ring(w, h))
+                cells = [cell for cell in range(w * h) if local[cell]]
+            for cell in cells:
+                blocked[(ty + cell // w) * cols + tx + cell % w] = 1
+
+    base = array("I", (cell for cell in range(cols * rows) if blocked[cell]))
+    per_level = max(1, round(cols * rows * rules["growth"]))
+    growth = array("I", grow_pillars(blocked, keep, cols, rows, per_level * GROWTH_LEVELS, rng))
+    return Layout(cols, rows, style, base, growth, per_level)
+
+def grow_pillars(blocked, keep, cols, rows, count, rng):
+    taken = bytearray(blocked)
+    pillars = []
+    for _ in range(count * 20):
+        if len(pillars) >= count:
+            break
+        cell = rng.randrange(cols * rows)
+        if taken[cell] or keep[cell]:
+            continue
+        x, y = cell % cols, cell // cols
+        if any(taken[ny * cols + nx]
+               for ny in range(max(0, y - 1), min(rows, y + 2))
+               for nx in range(max(0, x - 1), min(cols, x + 2))):
+            continue
+        taken[cell] = 1
+        pillars.append(cell)
+    return pillars
+
+# ---------------- CACHE ----------------
+# In memory per process, and on disk as
+#     header  magic "SNKM", version u8, cols u16, rows u16, mode u8, variant u8,
+#             style u8, clear count u16, per-level pillars u32, base count u32,
+#             growth count u32
+#     cells   clear, base and growth cells as u32
+layout_cache = {}
+
+def cache_path(cols, rows, mode, variant):
+    return os.path.join(MAP_DIR, f"{cols}x{rows}-{mode.lower()}-{variant}.bin")
+
+def encode_layout(layout, mode, variant, clear):
+    cells = array("I", clear)
+    cells.extend(layout.base)
+    cells.extend(layout.growth)
+    style = STYLES.index(layout.style) if layout.style else 255
+    header = HEADER.pack(MAGIC, MAP_VERSION, layout.cols, layout.rows, list(MAP_RULES).index(mode), variant,
+                         style, len(clear), layout.per_level, len(layout.base), len(layout.growth))
+    return header + cells.tobytes()
+
+def decode_layout(data, cols, rows, mode, variant, clear):
+    # None unless the file holds exactly this layout
+    if len(data) < HEADER.size:
+        return None
+    (magic, version, file_cols, file_rows, mode_index, file_variant, style, n_clear,
+     per_level, n_base, n_growth) = HEADER.unpack_from(data)
+    if (magic, version, file_cols, file_rows, mode_index, file_variant) != (
+            MAGIC, MAP_VERSION, cols, rows, list(MAP_RULES).index(mode), variant):
+        return None
+    cells = array("I")
+    cells.frombytes(data[HEADER.size:])
+    if len(cells) != n_clear + n_base + n_growth or list(cells[:n_clear]) != list(clear):
+        return None
+    return Layout(cols, rows, STYLES[style] if style < len(STYLES) else None,
+                  cells[n_clear:n_clear + n_base], cells[n_clear + n_base:], per_level)
+
+def get_layout(cols, rows, mode, variant, clear=()):
+    # Memory, then disk, then built (and saved for next time)
+    if mode not in MAP_RULES:
+        return EMPTY_LAYOUT
+    clear = [y * cols + x for x, y in clear if x < cols and y < rows]
+    key = (cols, rows, mode, variant, tuple(clear))
+    layout = layout_cache.get(key)
+    if layout is not None:
+        return layout
+    path = cache_path(cols, rows, mode, variant)
+    try:
+        with open(path, "rb") as f:
+            layout = decode_layout(f.read(), cols, rows, mode, variant, clear)
+    except OSError:
+        layout = None
+    if layout is None:
+        layout = build_layout(cols, rows, mode, variant, [(c % cols, c // cols) for c in clear])
+        try:
+            os.makedirs(MAP_DIR, exist_ok=True)
+            write_atomic(path, encode_layout(layout, mode, variant, clear))
+        except OSError:
+            pass
+    layout_cache[key] = layout
+    return layout
+
+# ---------------- CLI ----------------
+def parse_size(text):
+    try:
+        cols, rows = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected COLSxROWS, got {text!r}") from None
+    if cols < 10 or rows < 10:
+        raise argparse.ArgumentTypeError("boards must be at least 10x10 cells")
+    return cols, rows
+
+def check_layout(layout, clear):
+    # Every stage of growth, from the bare base to the last pillar, must stay connected
+    cols, rows = layout.cols, layout.rows
+    blocked = bytearray(cols * rows)
+    for cell in layout.base:
+        blocked[cell] = 1
+    if any(blocked[y * cols + x] for x, y in clear) or not is_connected(blocked, cols, rows):
+        return False
+    for level in range(2, GROWTH_LEVELS + 2):
+        for x, y in layout.pillars(level):
+            blocked[y * cols + x] = 1
+        if not is_connected(blocked, cols, rows):
+            return False
+    return True
+
+def show(layout, clear):
+    cols = layout.cols
+    marks = {cell: "#" for cell in layout.base}
+    marks.update((cell, "o") for cell in layout.growth[:layout.per_level * 3])
+    marks.update((y * cols + x, "S") for x, y in clear)
+    for y in range(layout.rows):
+        print("".join(marks.get(y * cols + x, ".") for x in range(cols)))
+
+def main(argv=None):
+    from snake_sim import SPAWN_CLEAR
+
+    parser = argparse.ArgumentParser(description="Build and check Snake Game hurdle layouts")
+    parser.add_argument("sizes", nargs="+", type=parse_size, metavar="COLSxROWS")
+    parser.add_argument("--mode", choices=list(MAP_RULES), action="append",
+                        help="only this mode (repeatable; default all with hurdles)")
+    parser.add_argument("--check", action="store_true", help="flood-fill every layout and growth stage")
+    parser.add_argument("--show", type=int, metavar="VARIANT", help="print one variant as text")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for cols, rows in args.sizes:
+        for mode in args.mode or list(MAP_RULES):
+            start = time.perf_counter()
+            layouts = [get_layout(cols, rows, mode, v, SPAWN_CLEAR) for v in range(VARIANTS)]
+            elapsed = time.perf_counter() - start
+            density = sum(len(layout.base) for layout in layouts) / (VARIANTS * cols * rows)
+            print(f"{cols}x{rows} {mode}: {VARIANTS} layouts in {elapsed * 1000:.1f} ms, "
+                  f"{density:.1%} hurdles, {layouts[0].per_level} pillars per level")
+            if args.check:
+                for variant, layout in enumerate(layouts):
+                    if not check_layout(layout, SPAWN_CLEAR):
+                        print(f"  variant {variant} ({layout.style}) is NOT connected")
+                        failed += 1
+            if args.show is not None:
+                show(layouts[args.show % VARIANTS], SPAWN_CLEAR)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
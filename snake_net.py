@@ -0,0 +1,807 @@
+import argparse
+import asyncio
+import random
+import struct
+import sys
+import time
+from collections import Counter, deque
+
+from snake_sim import (
+    DIFFICULTY, DIRECTIONS, MAGNET_RANGE, OPPOSITE, POWERUP_DURATION, POWERUP_KINDS,
+    POWERUP_SPAWN_SCORE_STEP, SLOW_FACTOR, SPAWN_CLEAR, FreeCells, HURDLE, BODY,
+)
+from snake_maps import VARIANTS, get_layout, parse_size
+
+# LAN multiplayer: several snakes on one board, run by an authoritative
+# asyncio TCP server. Clients send turns; every tick the server sends a delta
+# with only what changed, e.g. a player's new head and whether its tail moved,
+# so a tick costs a few bytes per moving snake however long the snakes are.
+# New clients get one full keyframe, after which TCP's ordering keeps them in step.
+#
+# Cells are flat indices (row * cols + col). Every message is a u32 length
+# followed by that many bytes, the first of which is the message type:
+#     client  H name                       hello, once
+#             T u8 direction, u32 seq       turn
+#     server  W u8 id, u8 mode, u16 cols, u16 rows, f32 tick rate
+#             K keyframe                    full state, once after W
+#             D u32 ack, delta              ack is the last turn seq applied
+# A delta is u32 tick, u8 player records, u16 foods gone + cells, u16 foods
+# added + cells, then u8 powerup state (0 same, 1 gone, 2 new + u8 kind, u32 cell).
+# A record is u8 id, u8 flags and the fields of the set flags in flag order.
+#
+#     python snake_net.py serve --mode HARD
+#     python snake_net.py join 192.168.1.20 --name ana
+#     python snake_net.py bots 40               # loopback load test
+
+DEFAULT_PORT = 47474
+MAX_PLAYERS = 64
+MAX_NAME = 16
+START_LENGTH = 3
+# Free cells a spawning snake needs in front of its head
+SPAWN_CLEARANCE = 4
+SPAWN_TRIES = 50
+RESPAWN_TICKS = 20
+PLAYERS_PER_FOOD = 3
+MAX_QUEUED_TURNS = 3
+# Bytes waiting to be sent to one client before it is dropped as too slow
+MAX_BUFFERED = 64 * 1024
+
+MODES = list(DIFFICULTY)
+DIRECTION_CODES = list(DIRECTIONS)
+
+# Record flags, in the order their fields follow the flags byte
+JOINED = 1      # u8 name length, name
+SPAWNED = 2     # u16 length, cells head first
+MOVED = 4       # u32 new head
+POPPED = 8      # tail cell left
+SCORED = 16     # u32 score
+DIED = 32
+LEFT = 64
+
+LENGTH = struct.Struct("<I")
+TURN = struct.Struct("<BI")
+WELCOME = struct.Struct("<BBHHf")
+U8 = struct.Struct("<B")
+U16 = struct.Struct("<H")
+U32 = struct.Struct("<I")
+
+class ProtocolError(ValueError):
+    pass
+
+# ---------------- RULES ----------------
+class Player:
+    def __init__(self, pid, name):
+        self.id = pid
+        self.name = name
+        self.snake = deque()  # cells, head first
+        self.direction = "RIGHT"
+        self.turns = deque()  # (direction, seq) not applied yet
+        self.seq = 0          # last turn seq dealt with
+        self.alive = False
+        self.respawn = 0
+        self.score = 0
+        self.last_powerup_score = -1
+        self.active = {kind: 0 for kind in POWERUP_KINDS}
+        self.slow_budget = 0.0
+
+    def queue_turn(self, direction, seq):
+        # Same checks as the single-player turn queue. A turn that is refused
+        # is acknowledged together with the one before it.
+        last = self.turns[-1][0] if self.turns else self.direction
+        if direction == last or direction == OPPOSITE[last] or len(self.turns) >= MAX_QUEUED_TURNS:
+            if self.turns:
+                self.turns[-1] = (self.turns[-1][0], seq)
+            else:
+                self.seq = seq
+            return
+        self.turns.append((direction, seq))
+
+class Arena:
+    # Shared-board version of SnakeSim's rules for many players. The board
+    # ticks at the mode's base speed; slow makes its holder skip ticks instead
+    # of slowing everyone down.
+    def __init__(self, cols=40, rows=30, seed=None, mode="HARD"):
+        self.cols = cols
+        self.rows = rows
+        self.mode = mode
+        self.rng = random.Random(seed)
+        self.speed = DIFFICULTY[mode]["speed"]
+        self.grid = bytearray(cols * rows)
+        self.free = FreeCells(self.grid)
+        # Same layouts as single player, without the growth: the arena has no levels
+        self.hurdles = list(get_layout(cols, rows, mode, self.rng.randrange(VARIANTS), SPAWN_CLEAR).base)
+        for cell in self.hurdles:
+            self.grid[cell] = HURDLE
+            self.free.remove(cell)
+        self.foods = set()
+        self.powerup = None  # (kind, cell)
+        self.players = {}
+        self.tick = 0
+        self._reset_changes()
+
+    def _reset_changes(self):
+        self.records = {}
+        # Food is sent as what changed over the whole tick, so a food that was
+        # pulled and then eaten within one tick never reaches the clients
+        self.foods_before = set(self.foods)
+        self.powerup_changed = False
+
+    def _record(self, player, flag):
+        record = self.records.setdefault(player.id, [0, None])
+        record[0] |= flag
+        return record
+
+    def powerup_ticks(self):
+        return max(1, round(POWERUP_DURATION * self.speed))
+
+    def add_player(self, name):
+        # None when the arena is full; the player spawns on a following tick. A
+        # pid whose LEFT is still waiting in records is free again only after
+        # that delta is sent, or the two would share one record
+        pid = next((i for i in range(MAX_PLAYERS) if i not in self.players and i not in self.records), None)
+        if pid is None:
+            return None
+        player = Player(pid, name)
+        self.players[pid] = player
+        self._record(player, JOINED)
+        return player
+
+    def remove_player(self, pid):
+        player = self.players.pop(pid)
+        self._clear_body(player)
+        # Whatever else it did this tick no longer matters to the others
+        self.records[pid] = [LEFT, None]
+
+    def _clear_body(self, player):
+        for cell in player.snake:
+            self.grid[cell] = 0
+            self.free.add(cell)
+        player.snake.clear()
+
+    def _spawn(self, player):
+        cols, rows = self.cols, self.rows
+        grid = self.grid
+        powerup = self.powerup[1] if self.powerup else None
+        for _ in range(SPAWN_TRIES):
+            head = self.free.choice(self.rng)
+            if head is None:
+                return False
+            direction = self.rng.choice(DIRECTION_CODES)
+            dx, dy = DIRECTIONS[direction]
+            x, y = head % cols, head // cols
+            cells = []
+            for k in range(-SPAWN_CLEARANCE, START_LENGTH):
+                cx, cy = x - dx * k, y - dy * k
+                cell = cy * cols + cx
+                if not (0 <= cx < cols and 0 <= cy < rows) or grid[cell] or cell in self.foods or cell == powerup:
+                    break
+                cells.append(cell)
+            else:
+                body = cells[SPAWN_CLEARANCE:]
+                for cell in body:
+                    grid[cell] = BODY
+                    self.free.remove(cell)
+                player.snake.extend(body)
+                player.direction = direction
+                player.alive = True
+                player.active = {kind: 0 for kind in POWERUP_KINDS}
+                player.slow_budget = 0.0
+                self._record(player, SPAWNED)
+                return True
+        return False
+
+    def _kill(self, player):
+        self._clear_body(player)
+        player.alive = False
+        player.respawn = RESPAWN_TICKS
+        if player.turns:
+            player.seq = player.turns[-1][1]
+            player.turns.clear()
+        self._record(player, DIED)
+
+    def _spawn_food(self):
+        for _ in range(SPAWN_TRIES):
+            cell = self.free.choice(self.rng)
+            if cell is None:
+                return
+            if cell not in self.foods and (self.powerup is None or cell != self.powerup[1]):
+                self.foods.add(cell)
+                return
+
+    def _move_food(self, old, new):
+        self.foods.discard(old)
+        self.foods.add(new)
+
+    def step(self):
+        # Advance one tick; the changes are left in records, foods_before and
+        # powerup_changed for encode_delta
+        self.tick += 1
+        cols, rows = self.cols, self.rows
+        grid = self.grid
+        movers = []
+        for player in self.players.values():
+            if not player.alive:
+                if player.respawn > 0:
+                    player.respawn -= 1
+                else:
+                    self._spawn(player)
+                continue
+            if player.turns:
+                player.direction, player.seq = player.turns.popleft()
+            if player.active["slow"] > 0:
+                player.slow_budget += SLOW_FACTOR
+                if player.slow_budget < 1.0:
+                    self._tick_powerups(player)
+                    continue
+                player.slow_budget -= 1.0
+            dx, dy = DIRECTIONS[player.direction]
+            head = player.snake[0]
+            x, y = head % cols + dx, head // cols + dy
+            movers.append((player, x, y))
+
+        # Everything is checked against the board as it was before the tick,
+        # so like in the single-player rules a tail only frees its cell afterwards
+        targets = Counter(y * cols + x for _, x, y in movers)
+        survivors = []
+        for player, x, y in movers:
+            cell = y * cols + x
+            if 0 <= x < cols and 0 <= y < rows and not grid[cell] and targets[cell] == 1:
+                survivors.append((player, cell))
+            elif player.active["shield"] > 0:
+                player.active["shield"] = 0
+                self._tick_powerups(player)
+            else:
+                self._kill(player)
+
+        for player, cell in survivors:
+            snake = player.snake
+            snake.appendleft(cell)
+            grid[cell] = BODY
+            self.free.remove(cell)
+            record = self._record(player, MOVED)
+            record[1] = cell
+            if cell in self.foods:
+                self.foods.discard(cell)
+                player.score += 20 if player.active["double"] > 0 else 10
+                self._record(player, SCORED)
+            else:
+                tail = snake.pop()
+                grid[tail] = 0
+                self.free.add(tail)
+                self._record(player, POPPED)
+            if self.powerup and cell == self.powerup[1]:
+                player.active[self.powerup[0]] = self.powerup_ticks()
+                self.powerup = None
+                self.powerup_changed = True
+            if player.active["magnet"] > 0:
+                self._pull_food(cell)
+            self._tick_powerups(player)
+            score = player.score
+            if (self.powerup is None and score > 0 and score % POWERUP_SPAWN_SCORE_STEP == 0
+                    and score != player.last_powerup_score):
+                self._spawn_powerup()
+                player.last_powerup_score = score
+
+        wanted = 1 + len(self.players) // PLAYERS_PER_FOOD
+        while len(self.foods) < wanted and len(self.free) > len(self.foods):
+            before = len(self.foods)
+            self._spawn_food()
+            if len(self.foods) == before:
+                break
+
+    def _tick_powerups(self, player):
+        active = player.active
+        for kind, remaining in active.items():
+            if remaining > 0:
+                active[kind] = remaining - 1
+
+    def _pull_food(self, head):
+        # The nearest food in range moves one cell toward the head
+        cols = self.cols
+        x, y = head % cols, head // cols
+        best = None
+        for food in self.foods:
+            distance = abs(food % cols - x) + abs(food // cols - y)
+            if distance <= MAGNET_RANGE and (best is None or distance < best[0]):
+                best = (distance, food)
+        if best:
+            food = best[1]
+            fx, fy = food % cols, food // cols
+            target = (fy + (y > fy) - (y < fy)) * cols + fx + (x > fx) - (x < fx)
+            if not self.grid[target] and target not in self.foods and not (self.powerup and target == self.powerup[1]):
+                self._move_food(food, target)
+
+    def _spawn_powerup(self):
+        for _ in range(SPAWN_TRIES):
+            cell = self.free.choice(self.rng)
+            if cell is None:
+                return
+            if cell not in self.foods:
+                self.powerup = (self.rng.choice(POWERUP_KINDS), cell)
+                self.powerup_changed = True
+                return
+
+# ---------------- ENCODING ----------------
+def frame(*parts):
+    payload = b"".join(parts)
+    return LENGTH.pack(len(payload)) + payload
+
+def pack_cells(cells, count=U16):
+    cells = list(cells)
+    return count.pack(len(cells)) + struct.pack(f"<{len(cells)}I", *cells)
+
+def encode_hello(name):
+    return frame(b"H", name.encode("utf-8", "replace")[:MAX_NAME])
+
+def encode_turn(direction, seq):
+    return frame(b"T", TURN.pack(DIRECTION_CODES.index(direction), seq))
+
+def encode_welcome(pid, arena):
+    return frame(b"W", WELCOME.pack(pid, MODES.index(arena.mode), arena.cols, arena.rows, arena.speed))
+
+def encode_keyframe(arena):
+    parts = [b"K", U32.pack(arena.tick), pack_cells(arena.hurdles), pack_cells(arena.foods)]
+    if arena.powerup:
+        parts.append(U8.pack(1) + struct.pack("<BI", POWERUP_KINDS.index(arena.powerup[0]), arena.powerup[1]))
+    else:
+        parts.append(U8.pack(0))
+    parts.append(U8.pack(len(arena.players)))
+    for player in arena.players.values():
+        name = player.name.encode("utf-8")
+        parts.append(struct.pack("<BBIB", player.id, player.alive, player.score, len(name)) + name)
+        parts.append(pack_cells(player.snake))
+    return frame(*parts)
+
+def encode_delta(arena):
+    # Shared by every client; each gets it behind its own ack by delta_message()
+    parts = [U32.pack(arena.tick), U8.pack(len(arena.records))]
+    for pid, (flags, head) in arena.records.items():
+        parts.append(struct.pack("<BB", pid, flags))
+        player = arena.players.get(pid)
+        if flags & JOINED:
+            name = player.name.encode("utf-8")
+            parts.append(U8.pack(len(name)) + name)
+        if flags & SPAWNED:
+            parts.append(pack_cells(player.snake))
+        if flags & MOVED:
+            parts.append(U32.pack(head))
+        if flags & SCORED:
+            parts.append(U32.pack(player.score))
+    parts.append(pack_cells(sorted(arena.foods_before - arena.foods)))
+    parts.append(pack_cells(sorted(arena.foods - arena.foods_before)))
+    if not arena.powerup_changed:
+        parts.append(U8.pack(0))
+    elif arena.powerup is None:
+        parts.append(U8.pack(1))
+    else:
+        parts.append(U8.pack(2) + struct.pack("<BI", POWERUP_KINDS.index(arena.powerup[0]), arena.powerup[1]))
+    return b"".join(parts)
+
+def delta_message(ack, body):
+    return LENGTH.pack(len(body) + 5) + b"D" + U32.pack(ack) + body
+
+async def read_message(reader):
+    size = LENGTH.unpack(await reader.readexactly(LENGTH.size))[0]
+    data = await reader.readexactly(size)
+    if not data:
+        raise ProtocolError("empty message")
+    return data[:1], data[1:]
+
+class Cursor:
+    # Sequential reads over one message
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def read(self, st):
+        try:
+            values = st.unpack_from(self.data, self.pos)
+        except struct.error:
+            raise ProtocolError("truncated message") from None
+        self.pos += st.size
+        return values if len(values) > 1 else values[0]
+
+    def read_bytes(self, n):
+        if self.pos + n > len(self.data):
+            raise ProtocolError("truncated message")
+        self.pos += n
+        return self.data[self.pos - n:self.pos]
+
+    def read_cells(self):
+        n = self.read(U16)
+        return struct.unpack(f"<{n}I", self.read_bytes(4 * n))
+
+# ---------------- CLIENT STATE ----------------
+class ArenaView:
+    # What a client knows of the arena, rebuilt from one keyframe and the deltas after it
+    def __init__(self, pid, mode, cols, rows, tick_rate):
+        self.id = pid
+        self.mode = mode
+        self.cols = cols
+        self.rows = rows
+        self.tick_rate = tick_rate
+        self.tick = 0
+        self.ack = 0
+        self.hurdles = []
+        self.foods = set()
+        self.powerup = None
+        self.snakes = {}
+        self.names = {}
+        self.scores = {}
+        self.tails = {}  # cell each snake's tail left on the last tick
+
+    @classmethod
+    def from_welcome(cls, body):
+        pid, mode, cols, rows, tick_rate = Cursor(body).read(WELCOME)
+        if mode >= len(MODES):
+            raise ProtocolError(f"unknown mode {mode}")
+        return cls(pid, MODES[mode], cols, rows, tick_rate)
+
+    def apply_keyframe(self, body):
+        c = Cursor(body)
+        self.tick = c.read(U32)
+        self.hurdles = list(c.read_cells())
+        self.foods = set(c.read_cells())
+        self.powerup = None
+        if c.read(U8):
+            kind, cell = c.read(struct.Struct("<BI"))
+            self.powerup = (POWERUP_KINDS[kind], cell)
+        self.snakes.clear()
+        self.names.clear()
+        self.scores.clear()
+        self.tails.clear()
+        for _ in range(c.read(U8)):
+            pid, _, score, name_len = c.read(struct.Struct("<BBIB"))
+            self.names[pid] = c.read_bytes(name_len).decode("utf-8", "replace")
+            self.scores[pid] = score
+            self.snakes[pid] = deque(c.read_cells())
+
+    def apply_delta(self, body):
+        c = Cursor(body)
+        self.ack = c.read(U32)
+        self.tick = c.read(U32)
+        self.tails.clear()
+        for _ in range(c.read(U8)):
+            pid, flags = c.read(struct.Struct("<BB"))
+            if flags & LEFT:
+                self.snakes.pop(pid, None)
+                self.names.pop(pid, None)
+                self.scores.pop(pid, None)
+                continue
+            if flags & JOINED:
+                self.names[pid] = c.read_bytes(c.read(U8)).decode("utf-8", "replace")
+                self.scores[pid] = 0
+                self.snakes[pid] = deque()
+            snake = self.snakes.setdefault(pid, deque())
+            if flags & SPAWNED:
+                snake.clear()
+                snake.extend(c.read_cells())
+            if flags & MOVED:
+                snake.appendleft(c.read(U32))
+            if flags & POPPED:
+                self.tails[pid] = snake.pop()
+            if flags & SCORED:
+                self.scores[pid] = c.read(U32)
+            if flags & DIED:
+                snake.clear()
+        self.foods.difference_update(c.read_cells())
+        self.foods.update(c.read_cells())
+        state = c.read(U8)
+        if state == 1:
+            self.powerup = None
+        elif state == 2:
+            kind, cell = c.read(struct.Struct("<BI"))
+            self.powerup = (POWERUP_KINDS[kind], cell)
+
+    def heading(self, pid):
+        # Direction of the last move, from the neck to the head
+        snake = self.snakes.get(pid)
+        if not snake or len(snake) < 2:
+            return None
+        step = snake[0] - snake[1]
+        if step == 1:
+            return "RIGHT"
+        if step == -1:
+            return "LEFT"
+        return "DOWN" if step > 0 else "UP"
+
+    def blocked(self):
+        cells = set(self.hurdles)
+        for snake in self.snakes.values():
+            cells.update(snake)
+        return cells
+
+    def xy(self, cell):
+        return cell % self.cols, cell // self.cols
+
+# ---------------- SERVER ----------------
+class Server:
+    def __init__(self, arena, tick_rate=None):
+        self.arena = arena
+        self.tick_rate = tick_rate or arena.speed
+        self.clients = {}  # id -> (player, writer)
+        self.bytes_sent = 0
+        self.tick_times = deque(maxlen=512)
+
+    async def handle(self, reader, writer):
+        player = None
+        try:
+            kind, body = await read_message(reader)
+            if kind != b"H":
+                raise ProtocolError("expected hello")
+            player = self.arena.add_player(body[:MAX_NAME].decode("utf-8", "replace") or "snake")
+            if player is None:
+                return
+            # Sent between ticks, so the next delta carries on from this keyframe
+            writer.write(encode_welcome(player.id, self.arena) + encode_keyframe(self.arena))
+            self.clients[player.id] = (player, writer)
+            while True:
+                kind, body = await read_message(reader)
+                if kind != b"T":
+                    raise ProtocolError(f"unexpected message {kind!r}")
+                code, seq = Cursor(body).read(TURN)
+                if code >= len(DIRECTION_CODES):
+                    raise ProtocolError(f"unknown direction {code}")
+                if player.alive:
+                    player.queue_turn(DIRECTION_CODES[code], seq)
+                else:
+                    player.seq = seq
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            if player is not None:
+                self.clients.pop(player.id, None)
+                self.arena.remove_player(player.id)
+            writer.close()
+
+    async def run(self, host, port, stats_every=0):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving {self.arena.mode} {self.arena.cols}x{self.arena.rows} on "
+              + ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in server.sockets)
+              + f" at {self.tick_rate:g} ticks/s")
+        async with server:
+            await self.tick_loop(stats_every)
+
+    async def tick_loop(self, stats_every=0, ticks=None):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tick_rate
+        deadline = loop.time()
+        last_report = (time.perf_counter(), 0)
+        while ticks is None or self.arena.tick < ticks:
+            deadline += interval
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Fell behind: skip the missed ticks rather than bursting through them
+                deadline = loop.time()
+            start = time.perf_counter()
+            self.broadcast()
+            self.tick_times.append(time.perf_counter() - start)
+            if stats_every and self.arena.tick % stats_every == 0:
+                now = time.perf_counter()
+                print(self.stats_line(now - last_report[0], self.bytes_sent - last_report[1]))
+                last_report = (now, self.bytes_sent)
+
+    def broadcast(self):
+        arena = self.arena
+        arena.step()
+        body = encode_delta(arena)
+        arena._reset_changes()
+        for player, writer in list(self.clients.values()):
+            transport = writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_BUFFERED:
+                # Too slow to keep up; bandwidth per client stays bounded
+                writer.close()
+                continue
+            message = delta_message(player.seq, body)
+            writer.write(message)
+            self.bytes_sent += len(message)
+
+    def stats_line(self, elapsed, sent):
+        ordered = sorted(self.tick_times)
+        p50 = ordered[len(ordered) // 2] * 1000.0 if ordered else 0.0
+        p99 = ordered[int(len(ordered) * 0.99)] * 1000.0 if ordered else 0.0
+        clients = len(self.clients)
+        per_client = f"{sent / elapsed / clients / 1024:.1f} KiB/s" if clients else "-"
+        return (f"tick {self.arena.tick}: {clients} clients, tick p50 {p50:.2f} ms p99 {p99:.2f} ms, "
+                f"{per_client} per client")
+
+# ---------------- CLIENTS ----------------
+class Connection:
+    # One connected client: the view plus turn prediction
+    def __init__(self, reader, writer, view):
+        self.reader = reader
+        self.writer = writer
+        self.view = view
+        self.seq = 0
+        self.pending = deque()  # (seq, direction) sent but not acknowledged
+        self.updated = time.perf_counter()
+
+    @classmethod
+    async def open(cls, host, port, name):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(encode_hello(name))
+        kind, body = await read_message(reader)
+        if kind != b"W":
+            raise ProtocolError("expected welcome")
+        view = ArenaView.from_welcome(body)
+        kind, body = await read_message(reader)
+        if kind != b"K":
+            raise ProtocolError("expected keyframe")
+        view.apply_keyframe(body)
+        return cls(reader, writer, view)
+
+    async def receive(self, on_delta=None):
+        while True:
+            kind, body = await read_message(self.reader)
+            if kind != b"D":
+                raise ProtocolError(f"unexpected message {kind!r}")
+            self.view.apply_delta(body)
+            self.updated = time.perf_counter()
+            while self.pending and self.pending[0][0] <= self.view.ack:
+                self.pending.popleft()
+            if on_delta:
+                on_delta(self)
+
+    def predicted_heading(self):
+        # Where the own snake goes next: the oldest unacknowledged turn, which
+        # the server applies on its next tick, or else its current heading
+        if self.pending:
+            return self.pending[0][1]
+        return self.view.heading(self.view.id)
+
+    def turn(self, direction):
+        last = self.pending[-1][1] if self.pending else self.view.heading(self.view.id)
+        if last is None or direction == last or direction == OPPOSITE[last] or len(self.pending) >= MAX_QUEUED_TURNS:
+            return
+        self.seq += 1
+        self.pending.append((self.seq, direction))
+        self.writer.write(encode_turn(direction, self.seq))
+
+    def predicted_snake(self):
+        # The own snake one tick ahead, plus the cell its tail leaves, for
+        # drawing it sliding into where the server will put it
+        snake = self.view.snakes.get(self.view.id)
+        heading = self.predicted_heading()
+        if not snake or heading is None:
+            return None, None
+        dx, dy = DIRECTIONS[heading]
+        x, y = self.view.xy(snake[0])
+        cells = [(x + dx, y + dy)] + [self.view.xy(cell) for cell in list(snake)[:-1]]
+        return cells, self.view.xy(snake[-1])
+
+    def close(self):
+        self.writer.close()
+
+def bot_turn(conn, rng):
+    # Loopback load: keep going unless the next cell is blocked, turn now and then
+    view = conn.view
+    snake = view.snakes.get(view.id)
+    heading = conn.predicted_heading()
+    if not snake or heading is None:
+        return
+    blocked = view.blocked()
+    x, y = view.xy(snake[0])
+    def free(direction):
+        dx, dy = DIRECTIONS[direction]
+        nx, ny = x + dx, y + dy
+        return 0 <= nx < view.cols and 0 <= ny < view.rows and ny * view.cols + nx not in blocked
+    if free(heading) and rng.random() > 0.1:
+        return
+    options = [d for d in DIRECTION_CODES if d != OPPOSITE[heading] and d != heading and free(d)]
+    if options:
+        conn.turn(rng.choice(options))
+
+async def run_bots(host, port, count, seconds, seed=0):
+    conns = [await Connection.open(host, port, f"bot{i}") for i in range(count)]
+    rng = random.Random(seed)
+    tasks = [asyncio.ensure_future(conn.receive(lambda c: bot_turn(c, rng))) for conn in conns]
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for conn in conns:
+            conn.close()
+    return conns
+
+async def play(host, port, name):
+    # Thin pygame client on top of the single-player drawing code
+    import pygame
+    import snake_game as game
+
+    conn = await Connection.open(host, port, name)
+    view = conn.view
+    game.WIDTH, game.HEIGHT = view.cols * game.BLOCK_SIZE, view.rows * game.BLOCK_SIZE
+    game.init()
+    pygame.display.set_caption(f"Snake Game - {name}")
+    receiver = asyncio.ensure_future(conn.receive())
+    try:
+        while not receiver.done():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN and event.key in game.KEY_DIRECTIONS:
+                    conn.turn(game.KEY_DIRECTIONS[event.key])
+            t = time.perf_counter() - game.IMPORT_TIME
+            alpha = min(1.0, (time.perf_counter() - conn.updated) * view.tick_rate)
+            game.draw_background()
+            for cell in view.hurdles:
+                game.draw_hurdle(view.xy(cell))
+            for cell in view.foods:
+                game.draw_food(view.xy(cell), t)
+            if view.powerup:
+                game.draw_powerup({"kind": view.powerup[0], "pos": view.xy(view.powerup[1])}, t)
+            for pid, snake in view.snakes.items():
+                if not snake:
+                    continue
+                cells, tail = conn.predicted_snake() if pid == view.id else (None, None)
+                if cells:
+                    # Drawn one tick ahead, so a turn shows the moment it is pressed
+                    game.draw_snake(cells, t, alpha, tail)
+                else:
+                    tail = view.tails.get(pid)
+                    game.draw_snake([view.xy(cell) for cell in snake], t, alpha, tail and view.xy(tail))
+                hx, hy = view.xy(snake[0])
+                game.draw_text(view.names.get(pid, "?"), game.small_font, game.WHITE,
+                               hx * game.BLOCK_SIZE, hy * game.BLOCK_SIZE - 22)
+            ranking = sorted(view.scores.items(), key=lambda item: -item[1])
+            for i, (pid, score) in enumerate(ranking[:8]):
+                color = game.ACCENT if pid == view.id else game.WHITE
+                game.draw_text(f"{view.names.get(pid, '?')}: {score}", game.small_font, color, 12, 10 + i * 20)
+            pygame.display.update()
+            await asyncio.sleep(1.0 / max(30, game.RENDER_FPS or 120))
+    finally:
+        receiver.cancel()
+        conn.close()
+        pygame.quit()
+
+# ---------------- CLI ----------------
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, DEFAULT_PORT
+    return host, int(port)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snake Game over the network")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run an arena")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--mode", choices=MODES, default="HARD")
+    serve.add_argument("--size", type=parse_size, default="60x40", metavar="COLSxROWS",
+                       help="board size in cells (default 60x40)")
+    serve.add_argument("--seed", type=int)
+    serve.add_argument("--tick-rate", type=float, help="ticks per second (default the mode's speed)")
+    serve.add_argument("--stats", type=int, default=0, metavar="TICKS",
+                       help="print tick time and bandwidth every TICKS ticks")
+    join = commands.add_parser("join", help="play in an arena")
+    join.add_argument("address", help="HOST or HOST:PORT")
+    join.add_argument("--name", default="player")
+    bots = commands.add_parser("bots", help="connect headless bots, for load tests")
+    bots.add_argument("count", type=int)
+    bots.add_argument("--address", default=f"127.0.0.1:{DEFAULT_PORT}")
+    bots.add_argument("--seconds", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            arena = Arena(*args.size, args.seed, args.mode)
+            asyncio.run(Server(arena, args.tick_rate).run(args.host, args.port, args.stats))
+        elif args.command == "join":
+            asyncio.run(play(*parse_address(args.address), args.name))
+        else:
+            asyncio.run(run_bots(*parse_address(args.address), args.count, args.seconds))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ProtocolError, asyncio.IncompleteReadError) as e:
+        print(f"Connection failed: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import csv
+import json
+import time
+from array import array
+
+# Opt-in per-phase frame timings. Each frame is split into phases by calling
+# mark(phase) as each one finishes; the time since the previous mark is
+# charged to that phase. The last `capacity` frames are kept in ring buffers.
+
+PHASES = ("events", "sim", "background", "snake", "food", "powerup", "particles", "hurdles", "hud", "present")
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+class FrameProfiler:
+    def __init__(self, capacity=1024, output=None):
+        self.capacity = capacity
+        self.output = output
+        self.frame_times = array("d", bytes(8 * capacity))
+        self.phase_times = {phase: array("d", bytes(8 * capacity)) for phase in PHASES}
+        self.dropped = array("l", bytes(array("l").itemsize * capacity))
+        self.index = 0
+        self.count = 0
+        self.total_frames = 0
+        self.total_dropped = 0
+        self.show_overlay = False
+        # Import to first presented frame, filled in by the game
+        self.startup_ms = None
+        # Key press to the tick that moved the snake, for the last `capacity` turns
+        self.input_latency = array("d", bytes(8 * capacity))
+        self.inputs = 0
+        self.dropped_inputs = 0
+        self._current = dict.fromkeys(PHASES, 0.0)
+        self._frame_start = None
+        self._last = 0.0
+        self._overlay = []
+        self._overlay_frame = -1
+
+    def begin_frame(self):
+        self._frame_start = self._last = time.perf_counter()
+        for phase in self._current:
+            self._current[phase] = 0.0
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self._current[phase] += now - self._last
+        self._last = now
+
+    def end_frame(self, dropped_ticks=0):
+        if self._frame_start is None:
+            return
+        i = self.index
+        self.frame_times[i] = time.perf_counter() - self._frame_start
+        for phase, elapsed in self._current.items():
+            self.phase_times[phase][i] = elapsed
+        self.dropped[i] = dropped_ticks
+        self.total_dropped += dropped_ticks
+        self.index = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.total_frames += 1
+        self._frame_start = None
+
+    def record_input(self, latency):
+        self.input_latency[self.inputs % self.capacity] = latency
+        self.inputs += 1
+
+    def drop_input(self):
+        self.dropped_inputs += 1
+
+    def _recent(self, values):
+        if self.count < self.capacity:
+            return values[:self.count]
+        return values[self.index:] + values[:self.index]
+
+    def summary(self):
+        # Frame and per-phase p50/p95/p99 in milliseconds over the buffered frames
+        def stats(values):
+            ordered = sorted(self._recent(values))
+            return {f"p{q}": percentile(ordered, q) * 1000.0 for q in (50, 95, 99)}
+        latency = sorted(self.input_latency[:min(self.inputs, self.capacity)])
+        return {
+            "frames": self.count,
+            "dropped_ticks": self.total_dropped,
+            "startup_ms": self.startup_ms,
+            "inputs": self.inputs,
+            "dropped_inputs": self.dropped_inputs,
+            "input_latency": {f"p{q}": percentile(latency, q) * 1000.0 for q in (50, 95, 99)},
+            "frame": stats(self.frame_times),
+            "phases": {phase: stats(values) for phase, values in self.phase_times.items()},
+        }
+
+    def overlay_lines(self, every=15):
+        # Recomputed every few frames; sorting the buffers each frame is wasted work
+        if self._overlay_frame < 0 or self.total_frames - self._overlay_frame >= every:
+            summary = self.summary()
+            frame = summary["frame"]
+            latency = summary["input_latency"]
+            self._overlay = [
+                f"frame p50 {frame['p50']:.2f}  p95 {frame['p95']:.2f}  p99 {frame['p99']:.2f} ms",
+                f"dropped ticks {summary['dropped_ticks']}",
+                f"input p50 {latency['p50']:.1f}  p99 {latency['p99']:.1f} ms, {summary['dropped_inputs']} dropped",
+            ] + [
+                f"{phase:<10} {stats['p50']:.2f} / {stats['p99']:.2f} ms"
+                for phase, stats in summary["phases"].items()
+            ]
+            self._overlay_frame = self.total_frames
+        return self._overlay
+
+    def dump(self, path):
+        # Raw samples, oldest first: CSV for a .csv path, JSON otherwise
+        frames = self._recent(self.frame_times)
+        phases = {phase: self._recent(values) for phase, values in self.phase_times.items()}
+        dropped = self._recent(self.dropped)
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame_ms", *PHASES, "dropped_ticks"])
+                for i, frame in enumerate(frames):
+                    writer.writerow([f"{frame * 1000.0:.4f}"]
+                                    + [f"{phases[p][i] * 1000.0:.4f}" for p in PHASES]
+                                    + [dropped[i]])
+        else:
+            with open(path, "w") as f:
+                json.dump({
+                    "summary": self.summary(),
+                    "samples_ms": {
+                        "frame": [v * 1000.0 for v in frames],
+                        **{p: [v * 1000.0 for v in phases[p]] for p in PHASES},
+                    },
+                    "dropped_ticks": list(dropped),
+                }, f)
+
+    def close(self):
+        if self.output:
+            try:
+                self.dump(self.output)
+            except OSError:
+                pass
+
+class NullProfiler:
+    # Stand-in used when profiling is off, so call sites need no checks
+    show_overlay = False
+
+    def __bool__(self):
+        return False
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self, dropped_ticks=0):
+        pass
+
+    def record_input(self, latency):
+        pass
+
+    def drop_input(self):
+        pass
+
+    def overlay_lines(self, every=15):
+        return []
+
+    def close(self):
+        pass
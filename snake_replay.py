@@ -0,0 +1,249 @@
+import argparse
+import os
+import struct
+import sys
+import time
+
+from snake_maps import MAP_RULES, MAP_VERSION
+from snake_sim import DIFFICULTY, DIRECTIONS, SnakeSim
+
+# Deterministic record/replay. A game is fully determined by its mode, seed and
+# board size plus the direction the snake had at each tick, so only the ticks
+# where the direction changed are stored.
+#
+# File layout (little endian):
+#     header  magic "SNKR", version u8, mode u8, seed u32, cols u16, rows u16,
+#             final score u32, ticks u32
+#             from version 4: MAP_VERSION of the hurdle layouts, u8
+#     events  varint((ticks since previous event << 3) | op)
+#             op 0-3 sets the direction (UP, DOWN, LEFT, RIGHT), op 4 resizes
+#             the board and is followed by varint cols, varint rows
+# A turn costs one or two bytes.
+#
+#     python snake_replay.py replays/            # verify every file, uncapped speed
+#     python snake_game.py --replay game.snr     # watch one in the window
+
+MAGIC = b"SNKR"
+# Version 1 files were recorded when every resize rebuilt the board, which
+# spawns differently after a resize, versions 1 and 2 before hurdles came
+# from snake_maps layouts, and versions 1 to 3 when powerups counted ticks
+# rather than time; they are still played back that way
+VERSION = 4
+HEADER = struct.Struct("<4sBBIHHII")
+MAP_HEADER = struct.Struct("<B")
+# Version 3 files came before the layout version was stored, from the first layouts
+FIRST_MAP_VERSION = 1
+MODES = list(DIFFICULTY)
+DIRECTION_CODES = list(DIRECTIONS)
+OP_RESIZE = 4
+EXTENSION = ".snr"
+
+class ReplayError(ValueError):
+    pass
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("truncated event stream")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+# ---------------- RECORDING ----------------
+class Recording:
+    def __init__(self, mode, seed, cols, rows, events=None, score=0, ticks=0, version=VERSION,
+                 map_version=MAP_VERSION):
+        self.mode = mode
+        self.seed = seed
+        self.cols = cols
+        self.rows = rows
+        # (tick, op, args) in the order they were applied; tick is sim.ticks before the step
+        self.events = events if events is not None else []
+        self.score = score
+        self.ticks = ticks
+        self.version = version
+        self.map_version = map_version
+
+    def encode(self):
+        out = bytearray(HEADER.pack(MAGIC, self.version, MODES.index(self.mode), self.seed,
+                                    self.cols, self.rows, self.score, self.ticks))
+        if self.version >= 4:
+            out += MAP_HEADER.pack(self.map_version)
+        last = 0
+        for tick, op, args in self.events:
+            write_varint(out, (tick - last) << 3 | op)
+            for value in args:
+                write_varint(out, value)
+            last = tick
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data):
+        if len(data) < HEADER.size:
+            raise ReplayError("file too short")
+        magic, version, mode, seed, cols, rows, score, ticks = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a replay file")
+        if not 1 <= version <= VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        if mode >= len(MODES):
+            raise ReplayError(f"unknown mode {mode}")
+        pos = HEADER.size
+        map_version = FIRST_MAP_VERSION
+        if version >= 4:
+            if len(data) < pos + MAP_HEADER.size:
+                raise ReplayError("file too short")
+            map_version = MAP_HEADER.unpack_from(data, pos)[0]
+            pos += MAP_HEADER.size
+        # Hurdles come from the layouts on these boards, so another generator
+        # would play a different game; EASY and pre-layout files have none
+        if version >= 3 and MODES[mode] in MAP_RULES and map_version != MAP_VERSION:
+            raise ReplayError(f"recorded with hurdle layouts v{map_version}, "
+                              f"but this version builds v{MAP_VERSION}")
+        events = []
+        tick = 0
+        while pos < len(data):
+            value, pos = read_varint(data, pos)
+            tick += value >> 3
+            op = value & 7
+            if op == OP_RESIZE:
+                new_cols, pos = read_varint(data, pos)
+                new_rows, pos = read_varint(data, pos)
+                events.append((tick, op, (new_cols, new_rows)))
+            elif op < len(DIRECTION_CODES):
+                events.append((tick, op, ()))
+            else:
+                raise ReplayError(f"unknown event op {op}")
+        return cls(MODES[mode], seed, cols, rows, events, score, ticks, version, map_version)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.encode())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.decode(f.read())
+
+class Recorder:
+    # Call before_step() right before every sim.step() and resized() after every
+    # successful sim.resize(); the direction is sampled at the tick it takes effect
+    def __init__(self, sim):
+        if not isinstance(sim.seed, int) or not 0 <= sim.seed < 2 ** 32:
+            raise ReplayError("recording needs a 32-bit integer seed")
+        self.recording = Recording(sim.mode, sim.seed, sim.cols, sim.rows)
+        self.direction = sim.direction
+
+    def before_step(self, sim):
+        if sim.direction != self.direction:
+            self.direction = sim.direction
+            self.recording.events.append((sim.ticks, DIRECTION_CODES.index(sim.direction), ()))
+
+    def resized(self, sim):
+        self.recording.events.append((sim.ticks, OP_RESIZE, (sim.cols, sim.rows)))
+
+    def finish(self, sim):
+        self.recording.score = sim.score
+        self.recording.ticks = sim.ticks
+        return self.recording
+
+# ---------------- PLAYBACK ----------------
+class Player:
+    # Feeds a recording back into a sim; before_step() returns False once the
+    # recording is over, either by tick count or by a resize the snake did not survive
+    def __init__(self, recording):
+        self.recording = recording
+        self.index = 0
+
+    def new_sim(self):
+        rec = self.recording
+        self.index = 0
+        return SnakeSim(rec.cols, rec.rows, rec.seed, rec.mode, maps=rec.version >= 3,
+                        timed_powerups=rec.version >= 4)
+
+    def restart(self, sim):
+        rec = self.recording
+        self.index = 0
+        sim.cols, sim.rows = rec.cols, rec.rows
+        sim.maps = rec.version >= 3
+        sim.timed_powerups = rec.version >= 4
+        sim.reset(rec.seed, rec.mode)
+
+    def before_step(self, sim):
+        events = self.recording.events
+        while self.index < len(events) and events[self.index][0] <= sim.ticks:
+            tick, op, args = events[self.index]
+            self.index += 1
+            if op == OP_RESIZE:
+                if not sim.resize(*args, rebuild=self.recording.version < 2):
+                    return False
+            else:
+                sim.direction = DIRECTION_CODES[op]
+        return sim.ticks < self.recording.ticks
+
+def replay(recording):
+    # Headless, as fast as the rules run; returns the finished sim
+    player = Player(recording)
+    sim = player.new_sim()
+    while sim.alive and player.before_step(sim):
+        sim.step()
+    return sim
+
+def verify(recording):
+    sim = replay(recording)
+    return sim.score == recording.score and sim.ticks == recording.ticks, sim
+
+def recording_path(directory, recording):
+    return os.path.join(directory, f"{recording.mode.lower()}-{recording.seed:08x}-{int(time.time())}{EXTENSION}")
+
+# ---------------- CLI ----------------
+def collect(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(EXTENSION):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify Snake Game replays headlessly")
+    parser.add_argument("paths", nargs="+", help="replay files or directories of them")
+    parser.add_argument("--quiet", "-q", action="store_true", help="only report mismatches")
+    args = parser.parse_args(argv)
+
+    games = ticks = failures = 0
+    start = time.perf_counter()
+    for path in collect(args.paths):
+        try:
+            recording = Recording.load(path)
+        except (OSError, ReplayError) as e:
+            print(f"ERROR    {path}: {e}")
+            failures += 1
+            continue
+        ok, sim = verify(recording)
+        games += 1
+        ticks += sim.ticks
+        if not ok:
+            failures += 1
+            print(f"MISMATCH {path}: recorded score {recording.score} after {recording.ticks} ticks, "
+                  f"replayed {sim.score} after {sim.ticks}")
+        elif not args.quiet:
+            print(f"ok       {path}: score {sim.score}, {sim.ticks} ticks")
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"{games} replays, {failures} failed, {ticks / elapsed:,.0f} ticks/s")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
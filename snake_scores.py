@@ -0,0 +1,100 @@
+import threading
+
+from snake_files import write_atomic
+from snake_sim import DIFFICULTY
+
+# Per-mode leaderboards, persisted by a background writer so the game loop
+# never waits on the disk. File format, one line per mode, best score first:
+#     EASY 320 250 90
+#     MEDIUM 410
+# A file holding a single integer is the old high score and is migrated.
+
+LEADERBOARD_SIZE = 10
+LEGACY_MODE = "MEDIUM"
+
+def parse_scores(text, size=LEADERBOARD_SIZE):
+    boards = {mode: [] for mode in DIFFICULTY}
+    text = text.strip()
+    if not text:
+        return boards, False
+    if text.isdigit():
+        boards[LEGACY_MODE] = [int(text)]
+        return boards, True
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 2 or parts[0] not in boards:
+            continue
+        try:
+            scores = [int(p) for p in parts[1:]]
+        except ValueError:
+            continue
+        boards[parts[0]] = sorted(scores, reverse=True)[:size]
+    return boards, False
+
+def format_scores(boards):
+    return "".join(f"{mode} {' '.join(map(str, scores))}\n" for mode, scores in boards.items() if scores)
+
+class ScoreStore:
+    def __init__(self, path, size=LEADERBOARD_SIZE):
+        self.path = path
+        self.size = size
+        self.last_error = None
+        try:
+            with open(path, "r") as f:
+                self.boards, migrated = parse_scores(f.read(), size)
+        except (OSError, UnicodeDecodeError):
+            self.boards, migrated = parse_scores("", size)
+        self._cond = threading.Condition()
+        self._pending = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer, name="score-writer", daemon=True)
+        self._thread.start()
+        if migrated:
+            self._schedule()
+
+    def high_score(self, mode):
+        board = self.boards.get(mode)
+        return board[0] if board else 0
+
+    def leaderboard(self, mode):
+        return list(self.boards.get(mode, []))
+
+    def submit(self, mode, score):
+        # Record a finished game; returns its 1-based rank, or None if it did not place
+        if score <= 0 or mode not in self.boards:
+            return None
+        board = self.boards[mode]
+        rank = sum(1 for s in board if s >= score)
+        if rank >= self.size:
+            return None
+        board.insert(rank, score)
+        del board[self.size:]
+        self._schedule()
+        return rank + 1
+
+    def _schedule(self):
+        # Only the latest snapshot matters; anything not yet written is replaced
+        with self._cond:
+            self._pending = format_scores(self.boards)
+            self._cond.notify()
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                text = self._pending
+                self._pending = None
+            try:
+                write_atomic(self.path, text)
+            except OSError as e:
+                self.last_error = e
+
+    def close(self, timeout=2.0):
+        # Flush whatever is pending and stop the writer
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
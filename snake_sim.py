@@ -0,0 +1,393 @@
+import random
+from array import array
+from collections import deque
+
+from snake_maps import VARIANTS, get_layout, open_pockets
+
+# Headless game rules. Positions are grid cells (col, row), not pixels, and
+# nothing here touches pygame so games can be simulated without a window.
+
+# ---------------- RULES ----------------
+DIFFICULTY = {
+    "EASY": {"speed": 8, "level_step": 60, "speed_step": 2},
+    "MEDIUM": {"speed": 10, "level_step": 50, "speed_step": 3},
+    "HARD": {"speed": 13, "level_step": 40, "speed_step": 4},
+}
+POWERUP_DURATION = 6.0
+# Powerup timers count down in microseconds of play, so they last the same
+# time whatever the tick rate
+TIMER_UNITS = 1_000_000
+POWERUP_SPAWN_SCORE_STEP = 70
+POWERUP_KINDS = ["slow", "magnet", "shield", "double"]
+SLOW_FACTOR = 0.6
+MAGNET_RANGE = 6
+
+DIRECTIONS = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+OPPOSITE = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+START_SNAKE = [(5, 5), (4, 5), (3, 5)]
+# Kept free of hurdles: the starting snake and the cells ahead of its head
+SPAWN_CLEAR = START_SNAKE + [(START_SNAKE[0][0] + k, START_SNAKE[0][1]) for k in range(1, 5)]
+
+# Occupancy flags, one byte per cell
+BODY = 1
+HURDLE = 2
+
+# ---------------- FREE CELLS ----------------
+class FreeCells:
+    # Set of free cell indices with O(1) add, remove and uniform random pick:
+    # a dense list plus each cell's slot in it (-1 while occupied)
+    def __init__(self, grid):
+        self.cells = [i for i, flags in enumerate(grid) if not flags]
+        self.slot = [-1] * len(grid)
+        for i, cell in enumerate(self.cells):
+            self.slot[cell] = i
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return self.slot[cell] >= 0
+
+    def add(self, cell):
+        if self.slot[cell] < 0:
+            self.slot[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def remove(self, cell):
+        i = self.slot[cell]
+        if i < 0:
+            return
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[i] = last
+            self.slot[last] = i
+        self.slot[cell] = -1
+
+    def resize(self, size):
+        # For a board that kept its row width: drop the cells from size on, or
+        # add the new ones at the end as free
+        old = len(self.slot)
+        for cell in range(size, old):
+            self.remove(cell)
+        del self.slot[size:]
+        self.slot.extend([-1] * (size - old))
+        for cell in range(old, size):
+            self.add(cell)
+
+    def choice(self, rng=random):
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+# ---------------- SPAWNING ----------------
+def spawn_food(free, cols, rng=random):
+    # None when there is no free cell left, i.e. the board is full
+    cell = free.choice(rng)
+    if cell is None:
+        return None
+    return (cell % cols, cell // cols)
+
+def spawn_powerup(free, food, cols, rng=random):
+    skip = food[1] * cols + food[0] if food else -1
+    if len(free) - (1 if skip >= 0 and skip in free else 0) <= 0:
+        return None
+    while True:
+        cell = free.choice(rng)
+        if cell != skip:
+            return {"kind": rng.choice(POWERUP_KINDS), "pos": (cell % cols, cell // cols)}
+
+def generate_hurdles(mode_name, free, cols, rng=random):
+    # Uniform scatter, as boards had before snake_maps layouts; kept for old replays.
+    # Takes its cells out of the free index, so anything to avoid must already be occupied
+    if mode_name == "MEDIUM":
+        count = 8
+    elif mode_name == "HARD":
+        count = 24
+    else:
+        return []
+    hurdles = []
+    for _ in range(min(count, len(free))):
+        cell = free.choice(rng)
+        free.remove(cell)
+        hurdles.append((cell % cols, cell // cols))
+    return hurdles
+
+# ---------------- SIMULATION ----------------
+class SnakeSim:
+    # maps=False places hurdles with generate_hurdles and never grows them,
+    # and timed_powerups=False counts powerups down one per tick, so slow
+    # stretched them; both are how games were played before
+    def __init__(self, cols=40, rows=30, seed=None, mode="MEDIUM", maps=True, timed_powerups=True):
+        self.cols = cols
+        self.rows = rows
+        self.mode = mode
+        self.maps = maps
+        self.timed_powerups = timed_powerups
+        self.fresh_board = None
+        self.reset(seed, mode)
+
+    def reset(self, seed=None, mode=None):
+        if mode is not None:
+            self.mode = mode
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.snake = deque(START_SNAKE)
+        self.hurdles = []
+        # Head moves so far; the segment in a cell is moves - entered[cell] back from the head
+        self.moves = len(START_SNAKE) - 1
+        if self.maps:
+            key = (self.cols, self.rows, self.mode, self.rng.randrange(VARIANTS))
+            if self.fresh_board and self.fresh_board[0] == key:
+                self.restore_fresh_board()
+            else:
+                self.build_grid()
+                self.layout = get_layout(self.cols, self.rows, self.mode, key[3], SPAWN_CLEAR)
+                self.hurdles = self.layout.hurdles()
+                for x, y in self.hurdles:
+                    self.free.remove(y * self.cols + x)
+                    self.grid[y * self.cols + x] = HURDLE
+                self.save_fresh_board(key)
+        else:
+            self.build_grid()
+            self.layout = None
+            self.hurdles = generate_hurdles(self.mode, self.free, self.cols, self.rng)
+            for x, y in self.hurdles:
+                self.grid[y * self.cols + x] = HURDLE
+        self.direction = "RIGHT"
+        self.food = spawn_food(self.free, self.cols, self.rng)
+        self.score = 0
+        self.level = 1
+        self.speed = DIFFICULTY[self.mode]["speed"]
+        self.powerup = None
+        self.last_powerup_score = -1
+        # Remaining time per powerup kind, in TIMER_UNITS (ticks if not timed_powerups)
+        self.active = {kind: 0 for kind in POWERUP_KINDS}
+        self.ticks = 0
+        # What the last tick did to the body, for renderers that interpolate
+        self.moved = False
+        self.last_tail = None
+        self.alive = True
+        self.won = False
+        self.death_cause = None
+
+    def build_grid(self):
+        # Occupancy bitmap indexed by row * cols + col, when each body cell was
+        # entered and the free-cell index, all kept in step with snake and hurdles
+        cols = self.cols
+        self.grid = bytearray(cols * self.rows)
+        for x, y in self.hurdles:
+            self.grid[y * cols + x] = HURDLE
+        self.entered = array("q", bytes(8 * cols * self.rows))
+        for k, (x, y) in enumerate(self.snake):
+            self.grid[y * cols + x] |= BODY
+            self.entered[y * cols + x] = self.moves - k
+        self.free = FreeCells(self.grid)
+
+    def save_fresh_board(self, key):
+        # A layout's starting board is the same every game, so the next reset
+        # onto the same size, mode and variant copies it back instead of
+        # rebuilding it. The free cells keep their order, and so do spawns
+        free = self.free
+        self.fresh_board = (key, self.layout, self.hurdles, bytes(self.grid), array("q", self.entered),
+                            list(free.cells), list(free.slot))
+
+    def restore_fresh_board(self):
+        # The key holds the board size, so the buffers are already the right length
+        _, self.layout, self.hurdles, grid, entered, cells, slot = self.fresh_board
+        self.grid[:] = grid
+        self.entered[:] = entered
+        self.free.cells[:] = cells
+        self.free.slot[:] = slot
+
+    def reshape_grid(self, cols, rows):
+        old_cols = self.cols
+        if cols == old_cols:
+            # Rows only come or go at the end of the flat index
+            size = cols * rows
+            del self.grid[size:]
+            del self.entered[size:]
+            self.grid.extend(bytes(size - len(self.grid)))
+            self.entered.extend(array("q", bytes(8 * (size - len(self.entered)))))
+            self.free.resize(size)
+        else:
+            # Every row moves: copy the kept part of each one across
+            keep_cols, keep_rows = min(cols, old_cols), min(rows, self.rows)
+            grid = bytearray(cols * rows)
+            entered = array("q", bytes(8 * cols * rows))
+            for y in range(keep_rows):
+                grid[y * cols:y * cols + keep_cols] = self.grid[y * old_cols:y * old_cols + keep_cols]
+                entered[y * cols:y * cols + keep_cols] = self.entered[y * old_cols:y * old_cols + keep_cols]
+            self.grid = grid
+            self.entered = entered
+            self.free = FreeCells(grid)
+        self.cols = cols
+        self.rows = rows
+
+    def tick_rate(self):
+        # Simulation ticks per second, with the slow powerup applied
+        return self.speed * (SLOW_FACTOR if self.active["slow"] > 0 else 1.0)
+
+    def powerup_time(self):
+        if self.timed_powerups:
+            return round(POWERUP_DURATION * TIMER_UNITS)
+        return max(1, round(POWERUP_DURATION * self.speed))
+
+    def tick_time(self):
+        # How much one tick at the current rate takes off the powerup timers
+        if self.timed_powerups:
+            return round(TIMER_UNITS / self.tick_rate())
+        return 1
+
+    def turn(self, direction):
+        if direction in DIRECTIONS and direction != OPPOSITE[self.direction]:
+            self.direction = direction
+
+    def step(self, action=None):
+        # Advance one tick; returns the events that happened
+        # ("ate", "powerup", "shield", "dead", "won")
+        if not self.alive:
+            return ("dead",)
+        if action is not None:
+            self.turn(action)
+        self.ticks += 1
+        elapsed = self.tick_time()
+        self.moved = False
+        self.last_tail = None
+        dx, dy = DIRECTIONS[self.direction]
+        x, y = self.snake[0]
+        x += dx
+        y += dy
+        new_head = (x, y)
+
+        # Collision with walls, itself or hurdles
+        cols = self.cols
+        grid = self.grid
+        if x < 0 or x >= cols or y < 0 or y >= self.rows:
+            cause = "wall"
+        elif grid[y * cols + x] & BODY:
+            cause = "self"
+        elif grid[y * cols + x] & HURDLE:
+            cause = "hurdle"
+        else:
+            cause = None
+        if cause:
+            if self.active["shield"] > 0:
+                # Consume shield instead of dying
+                self.active["shield"] = 0
+                return ("shield",)
+            self.alive = False
+            self.death_cause = cause
+            return ("dead",)
+
+        events = ()
+        free = self.free
+        self.moved = True
+        self.moves += 1
+        self.snake.appendleft(new_head)
+        grid[y * cols + x] = BODY
+        self.entered[y * cols + x] = self.moves
+        free.remove(y * cols + x)
+
+        # Food collision
+        if new_head == self.food:
+            self.score += 20 if self.active["double"] > 0 else 10
+            self.food = spawn_food(free, cols, self.rng)
+            rules = DIFFICULTY[self.mode]
+            if self.score % rules["level_step"] == 0:
+                self.level += 1
+                self.speed += rules["speed_step"]
+                self.grow_hurdles()
+            if self.food is None:
+                # Snake fills every free cell
+                self.alive = False
+                self.won = True
+                return ("ate", "won")
+            events = ("ate",)
+        else:
+            tx, ty = self.last_tail = self.snake.pop()
+            grid[ty * cols + tx] = 0
+            free.add(ty * cols + tx)
+
+        # Powerup collection
+        if self.powerup and new_head == self.powerup["pos"]:
+            self.active[self.powerup["kind"]] = self.powerup_time()
+            self.powerup = None
+            events += ("powerup",)
+
+        # Magnet pulls food toward head by one tile
+        if self.active["magnet"] > 0:
+            fx, fy = self.food
+            if abs(x - fx) + abs(y - fy) <= MAGNET_RANGE:
+                candidate = (fx + (x > fx) - (x < fx), fy + (y > fy) - (y < fy))
+                if not grid[candidate[1] * cols + candidate[0]]:
+                    self.food = candidate
+
+        # Tick active powerups and spawn new ones
+        for kind, remaining in self.active.items():
+            if remaining > 0:
+                self.active[kind] = max(0, remaining - elapsed)
+        score = self.score
+        if (self.powerup is None and score > 0 and score % POWERUP_SPAWN_SCORE_STEP == 0
+                and score != self.last_powerup_score):
+            self.powerup = spawn_powerup(free, self.food, cols, self.rng)
+            self.last_powerup_score = score
+        return events
+
+    def grow_hurdles(self):
+        # The layout's pillars for the new level, skipping any with something in
+        # the way or right in front of the head. A pillar with no hurdle around
+        # it cannot cut the board in two.
+        if self.layout is None:
+            return
+        cols, rows = self.cols, self.rows
+        grid = self.grid
+        hx, hy = self.snake[0]
+        powerup = self.powerup["pos"] if self.powerup else None
+        added = []
+        for x, y in self.layout.pillars(self.level):
+            if (x >= cols or y >= rows or grid[y * cols + x] or (x, y) == self.food or (x, y) == powerup
+                    or abs(x - hx) + abs(y - hy) <= 2):
+                continue
+            if any(grid[ny * cols + nx] & HURDLE
+                   for ny in range(max(0, y - 1), min(rows, y + 2))
+                   for nx in range(max(0, x - 1), min(cols, x + 2))):
+                continue
+            grid[y * cols + x] = HURDLE
+            self.free.remove(y * cols + x)
+            added.append((x, y))
+        if added:
+            # A new list, so views keyed on the old one notice
+            self.hurdles = self.hurdles + added
+
+    def resize(self, cols, rows, rebuild=False):
+        # Returns False when the snake no longer fits on the board. The grid is
+        # copied over rather than rebuilt from the snake and hurdles, and when
+        # only the row count changes just the rows that come or go are touched.
+        # rebuild=True rebuilds everything, which orders the free cells (and so
+        # later spawns) the way resizes did before
+        if not all(x < cols and y < rows for x, y in self.snake):
+            return False
+        shrunk = cols < self.cols or rows < self.rows
+        if shrunk:
+            self.hurdles = [h for h in self.hurdles if h[0] < cols and h[1] < rows]
+        if rebuild:
+            self.cols = cols
+            self.rows = rows
+            self.build_grid()
+        else:
+            self.reshape_grid(cols, rows)
+        if shrunk and self.maps:
+            # Losing the board's edge can close off a gap; open walls until it is one piece again
+            hx, hy = self.snake[0]
+            opened = open_pockets(self.grid, cols, rows, HURDLE, hy * cols + hx)
+            for cell in opened:
+                self.grid[cell] &= ~HURDLE
+                self.free.add(cell)
+            if opened:
+                opened = {(cell % cols, cell // cols) for cell in opened}
+                self.hurdles = [h for h in self.hurdles if h not in opened]
+        if self.food and not (self.food[0] < cols and self.food[1] < rows):
+            self.food = spawn_food(self.free, cols, self.rng)
+        if self.powerup and not (self.powerup["pos"][0] < cols and self.powerup["pos"][1] < rows):
+            self.powerup = None
+        return True
@@ -0,0 +1,265 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+import snake_sim
+from snake_agent import AGENTS, RandomAgent
+from snake_maps import parse_size
+from snake_sim import DIFFICULTY, POWERUP_KINDS, SnakeSim
+
+# Plays many headless games across a process pool and prints summary tables.
+# Work is handed out in chunks of seeds; each chunk comes back as an aggregate
+# (plus its per-game rows when --games-csv is set), so memory stays bounded
+# however many games are played.
+#
+#     python snake_tournament.py --games 2000 --agents autopilot,greedy
+#     python snake_tournament.py --set MEDIUM.level_step=40 --set POWERUP_DURATION=4
+
+OUTCOMES = ("wall", "self", "hurdle", "won", "timeout")
+RULE_KEYS = ("speed", "level_step", "speed_step")
+GLOBAL_RULES = ("POWERUP_DURATION", "POWERUP_SPAWN_SCORE_STEP", "SLOW_FACTOR", "MAGNET_RANGE")
+
+# Set in every worker by init_worker
+config = {}
+
+def parse_override(text):
+    # "MEDIUM.level_step=40" or "POWERUP_DURATION=4"
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    try:
+        number = int(value)
+    except ValueError:
+        try:
+            number = float(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{name}: {value!r} is not a number") from None
+    mode, dot, key = name.partition(".")
+    if dot:
+        if mode not in DIFFICULTY or key not in RULE_KEYS:
+            raise argparse.ArgumentTypeError(f"unknown rule {name!r}")
+    elif name not in GLOBAL_RULES:
+        raise argparse.ArgumentTypeError(f"unknown rule {name!r}")
+    return name, number
+
+def apply_overrides(overrides):
+    for name, value in overrides:
+        mode, dot, key = name.partition(".")
+        if dot:
+            snake_sim.DIFFICULTY[mode][key] = value
+        else:
+            setattr(snake_sim, name, value)
+
+def init_worker(settings):
+    config.update(settings)
+    apply_overrides(settings["overrides"])
+
+# ---------------- GAMES ----------------
+def make_agent(name, seed):
+    if name == "random":
+        return RandomAgent(seed)
+    return AGENTS[name]()
+
+def play(mode, agent_name, seed):
+    sim = SnakeSim(config["cols"], config["rows"], seed, mode)
+    agent = make_agent(agent_name, seed)
+    powerups = Counter()
+    shields = 0
+    max_ticks = config["max_ticks"]
+    while sim.alive and sim.ticks < max_ticks:
+        kind = sim.powerup["kind"] if sim.powerup else None
+        events = sim.step(agent.decide(sim))
+        if "powerup" in events:
+            powerups[kind] += 1
+        elif "shield" in events:
+            shields += 1
+    if sim.won:
+        outcome = "won"
+    elif sim.alive:
+        outcome = "timeout"
+    else:
+        outcome = sim.death_cause
+    return {
+        "mode": mode, "agent": agent_name, "seed": seed,
+        "score": sim.score, "level": sim.level, "ticks": sim.ticks, "length": len(sim.snake),
+        "outcome": outcome, "shields": shields, "hurdles": len(sim.hurdles),
+        **{f"powerup_{kind}": powerups[kind] for kind in POWERUP_KINDS},
+    }
+
+class Aggregate:
+    # Running totals for one (mode, agent) pair. Scores are multiples of ten, so
+    # a Counter of them stays small and still gives exact percentiles.
+    def __init__(self):
+        self.games = 0
+        self.scores = Counter()
+        self.level_total = 0
+        self.max_level = 0
+        self.tick_total = 0
+        self.length_total = 0
+        self.outcomes = Counter()
+        self.powerups = Counter()
+        self.shields = 0
+
+    def add(self, result):
+        self.games += 1
+        self.scores[result["score"]] += 1
+        self.level_total += result["level"]
+        self.max_level = max(self.max_level, result["level"])
+        self.tick_total += result["ticks"]
+        self.length_total += result["length"]
+        self.outcomes[result["outcome"]] += 1
+        for kind in POWERUP_KINDS:
+            self.powerups[kind] += result[f"powerup_{kind}"]
+        self.shields += result["shields"]
+
+    def merge(self, other):
+        self.games += other.games
+        self.scores.update(other.scores)
+        self.level_total += other.level_total
+        self.max_level = max(self.max_level, other.max_level)
+        self.tick_total += other.tick_total
+        self.length_total += other.length_total
+        self.outcomes.update(other.outcomes)
+        self.powerups.update(other.powerups)
+        self.shields += other.shields
+
+    def score_percentile(self, q):
+        target = q / 100 * (self.games - 1)
+        seen = 0
+        for score in sorted(self.scores):
+            seen += self.scores[score]
+            if seen > target:
+                return score
+        return 0
+
+    def summary(self):
+        games = max(1, self.games)
+        return {
+            "games": self.games,
+            "score_mean": sum(s * n for s, n in self.scores.items()) / games,
+            "score_p10": self.score_percentile(10),
+            "score_p50": self.score_percentile(50),
+            "score_p90": self.score_percentile(90),
+            "score_max": max(self.scores, default=0),
+            "level_mean": self.level_total / games,
+            "level_max": self.max_level,
+            "ticks_mean": self.tick_total / games,
+            "length_mean": self.length_total / games,
+            "outcomes": {o: self.outcomes[o] / games for o in OUTCOMES},
+            "powerups_per_game": {k: self.powerups[k] / games for k in POWERUP_KINDS},
+            "shields_per_game": self.shields / games,
+        }
+
+def run_chunk(job):
+    mode, agent_name, first, count = job
+    aggregate = Aggregate()
+    rows = [] if config["rows_out"] else None
+    for seed in range(first, first + count):
+        result = play(mode, agent_name, seed)
+        aggregate.add(result)
+        if rows is not None:
+            rows.append(result)
+    return mode, agent_name, aggregate, rows
+
+def make_jobs(modes, agents, seed, games, chunk):
+    for mode, agent_name in itertools.product(modes, agents):
+        for first in range(seed, seed + games, chunk):
+            yield mode, agent_name, first, min(chunk, seed + games - first)
+
+# ---------------- REPORTING ----------------
+def print_tables(results):
+    header = (f"{'mode':<7} {'agent':<10} {'games':>6} {'mean':>7} {'p10':>6} {'p50':>6} {'p90':>6} {'max':>6}"
+              f" {'level':>6} {'ticks':>8}  " + " ".join(f"{o:>7}" for o in OUTCOMES))
+    print("\nScores and outcomes")
+    print(header)
+    for (mode, agent_name), s in results.items():
+        print(f"{mode:<7} {agent_name:<10} {s['games']:>6} {s['score_mean']:>7.1f} {s['score_p10']:>6}"
+              f" {s['score_p50']:>6} {s['score_p90']:>6} {s['score_max']:>6} {s['level_mean']:>6.2f}"
+              f" {s['ticks_mean']:>8.0f}  " + " ".join(f"{s['outcomes'][o]:>7.1%}" for o in OUTCOMES))
+    print("\nPowerups per game")
+    print(f"{'mode':<7} {'agent':<10} " + " ".join(f"{k:>7}" for k in POWERUP_KINDS) + f" {'saves':>7}")
+    for (mode, agent_name), s in results.items():
+        print(f"{mode:<7} {agent_name:<10} "
+              + " ".join(f"{s['powerups_per_game'][k]:>7.2f}" for k in POWERUP_KINDS)
+              + f" {s['shields_per_game']:>7.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless Snake Game tournaments")
+    parser.add_argument("--games", type=int, default=200, help="games per mode and agent (default 200)")
+    parser.add_argument("--modes", default=",".join(DIFFICULTY), help="comma separated (default all)")
+    parser.add_argument("--agents", default="autopilot,greedy,random",
+                        help=f"comma separated, from {', '.join(AGENTS)}")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; game i uses seed + i")
+    parser.add_argument("--size", type=parse_size, default="40x30", metavar="COLSxROWS",
+                        help="board size in cells (default 40x30)")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="stop a game after this many ticks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default all cores)")
+    parser.add_argument("--chunk", type=int, default=25, help="games per task (default 25)")
+    parser.add_argument("--set", dest="overrides", action="append", type=parse_override, default=[],
+                        metavar="RULE=VALUE",
+                        help="override a rule, e.g. MEDIUM.level_step=40 or POWERUP_DURATION=4")
+    parser.add_argument("--json", metavar="PATH", help="write the summary tables as JSON")
+    parser.add_argument("--games-csv", metavar="PATH", help="stream one row per game to a CSV file")
+    args = parser.parse_args(argv)
+
+    modes = args.modes.split(",")
+    agents = args.agents.split(",")
+    for name in modes:
+        if name not in DIFFICULTY:
+            parser.error(f"unknown mode {name!r}")
+    for name in agents:
+        if name not in AGENTS:
+            parser.error(f"unknown agent {name!r}")
+    cols, rows = args.size
+
+    settings = {
+        "cols": cols, "rows": rows, "max_ticks": args.max_ticks,
+        "overrides": args.overrides, "rows_out": bool(args.games_csv),
+    }
+    jobs = list(make_jobs(modes, agents, args.seed, args.games, max(1, args.chunk)))
+    totals = {(mode, agent_name): Aggregate() for mode, agent_name in itertools.product(modes, agents)}
+    csv_file = writer = None
+    if args.games_csv:
+        csv_file = open(args.games_csv, "w", newline="")
+    start = time.perf_counter()
+    done = 0
+    try:
+        with Pool(max(1, args.workers), initializer=init_worker, initargs=(settings,)) as pool:
+            for mode, agent_name, aggregate, game_rows in pool.imap_unordered(run_chunk, jobs):
+                totals[mode, agent_name].merge(aggregate)
+                done += aggregate.games
+                if game_rows:
+                    if writer is None:
+                        writer = csv.DictWriter(csv_file, fieldnames=list(game_rows[0]))
+                        writer.writeheader()
+                    writer.writerows(game_rows)
+                print(f"\r{done}/{len(modes) * len(agents) * args.games} games", end="", file=sys.stderr, flush=True)
+    finally:
+        if csv_file:
+            csv_file.close()
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+
+    results = {key: aggregate.summary() for key, aggregate in totals.items()}
+    if args.overrides:
+        print("Rules: " + ", ".join(f"{name}={value}" for name, value in args.overrides))
+    print_tables(results)
+    print(f"\n{done} games in {elapsed:.1f}s on {max(1, args.workers)} workers")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "overrides": dict(args.overrides),
+                "size": [cols, rows],
+                "max_ticks": args.max_ticks,
+                "results": [{"mode": m, "agent": a, **s} for (m, a), s in results.items()],
+            }, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+from snake_agent import Autopilot
+from snake_batch import DEATH_CAUSES, DIRECTION_NAMES, SnakeBatch
+from snake_maps import VARIANTS
+from snake_sim import POWERUP_KINDS, SnakeSim
+
+class Spawns:
+    # Stands in for a SnakeSim's rng so it spawns food and powerups where the
+    # batch did: randrange() picks the listed cell's slot in the free cells
+    def __init__(self, sim):
+        self.sim = sim
+        self.cells = []
+        self.kinds = []
+
+    def randrange(self, n):
+        return self.sim.free.slot[self.cells.pop(0)]
+
+    def choice(self, seq):
+        return seq[self.kinds.pop(0)]
+
+def twin_cell(batch, cell):
+    return (int(cell) % batch.cols, int(cell) // batch.cols)
+
+def twin_sim(batch, game, mode):
+    # A SnakeSim on the same layout variant, food and board as one batch game
+    variant = int(batch.layout[game]) % VARIANTS
+    seed = next(s for s in range(1000) if random.Random(s).randrange(VARIANTS) == variant)
+    sim = SnakeSim(batch.cols, batch.rows, seed=seed, mode=mode)
+    sim.food = twin_cell(batch, batch.food[game])
+    sim.rng = Spawns(sim)
+    return sim
+
+def record_spawns(batch):
+    # Cells the batch picks for each game's food and powerups during a step,
+    # in order, before the magnet gets to move any of them
+    spawned = {}
+    sample_free = batch._sample_free
+
+    def sample(games, exclude=None, tries=8):
+        cells = sample_free(games, exclude, tries)
+        for game, cell in zip(games, cells):
+            spawned.setdefault(int(game), []).append(int(cell))
+        return cells
+
+    batch._sample_free = sample
+    return spawned
+
+def run_lockstep(mode, seed, games=8, ticks=1500):
+    # Steps SnakeBatch and one SnakeSim per game with the same turns; returns the
+    # first (game, tick) where score, length, food, timers, alive or death cause differ
+    batch = SnakeBatch(games, mode=mode, seed=seed)
+    sims = [twin_sim(batch, i, mode) for i in range(games)]
+    spawned = record_spawns(batch)
+    pilots = [Autopilot() for _ in range(games)]
+    scores = [0] * games
+    rng = random.Random(seed)
+    for tick in range(ticks):
+        actions = np.full(games, -1, dtype=np.int64)
+        turns = [None] * games
+        for i, sim in enumerate(sims):
+            if sim.alive:
+                # Mostly the autopilot, so games get long enough for powerups
+                # and level-ups, with the odd random turn to end some of them
+                turn = rng.choice(DIRECTION_NAMES) if rng.random() < 0.03 else pilots[i].decide(sim)
+                if turn is not None:
+                    turns[i] = turn
+                    actions[i] = DIRECTION_NAMES.index(turn)
+                if rng.random() < 0.02:
+                    # A powerup handed to both, far more often than they spawn
+                    kind = rng.randrange(len(POWERUP_KINDS))
+                    sim.active[POWERUP_KINDS[kind]] = batch.timers[i, kind] = sim.powerup_time()
+        spawned.clear()
+        rewards, done = batch.step(actions)
+        for i, sim in enumerate(sims):
+            if not sim.alive:
+                continue
+            sim.rng.cells = spawned.get(i, [])
+            sim.rng.kinds = [int(batch.powerup_kind[i])]
+            sim.step(turns[i])
+            scores[i] += int(rewards[i])
+            cause = DEATH_CAUSES[batch.death_cause[i]] if done[i] else None
+            if (sim.score, sim.alive, sim.death_cause) != (scores[i], not done[i], cause):
+                return i, tick
+            if done[i]:
+                continue
+            timers = [sim.active[kind] for kind in POWERUP_KINDS]
+            if (len(sim.snake), sim.food, timers) != (batch.length[i], twin_cell(batch, batch.food[i]),
+                                                       batch.timers[i].tolist()):
+                return i, tick
+        if not any(sim.alive for sim in sims):
+            break
+    return None
+
+@pytest.mark.parametrize("mode", ["EASY", "MEDIUM", "HARD"])
+def test_batch_matches_sim(mode):
+    for seed in range(3):
+        assert run_lockstep(mode, seed) is None, seed
@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snake_net import LENGTH, U32, Arena, ArenaView, DIRECTION_CODES, encode_delta, encode_keyframe
+
+def run_loopback(seed, players=12, ticks=600, magnet=False, churn=0):
+    # Server arena and a client view fed only the encoded messages; returns
+    # the first tick on which they disagree, or None. Every churn ticks one
+    # player leaves and another joins before the tick, as when one client
+    # drops and another connects between two broadcasts
+    rng = random.Random(seed)
+    arena = Arena(24, 18, seed=seed, mode="HARD")
+    for i in range(players):
+        arena.add_player(f"p{i}")
+    view = ArenaView(0, arena.mode, arena.cols, arena.rows, arena.speed)
+    view.apply_keyframe(encode_keyframe(arena)[LENGTH.size + 1:])
+    arena._reset_changes()
+    seq = 0
+    for _ in range(ticks):
+        if churn and arena.tick % churn == 0:
+            arena.remove_player(rng.choice([pid for pid in arena.players if pid != view.id]))
+            arena.add_player(f"n{arena.tick}")
+        for player in arena.players.values():
+            if magnet:
+                player.active["magnet"] = 1000
+            if rng.random() < 0.3:
+                seq += 1
+                player.queue_turn(rng.choice(DIRECTION_CODES), seq)
+        arena.step()
+        view.apply_delta(U32.pack(0) + encode_delta(arena))
+        arena._reset_changes()
+        snakes = {pid: list(p.snake) for pid, p in arena.players.items()}
+        seen = {pid: list(snake) for pid, snake in view.snakes.items()}
+        if (view.tick, view.foods, view.powerup, seen) != (arena.tick, arena.foods, arena.powerup, snakes):
+            return arena.tick
+    return None
+
+def test_view_matches_server():
+    for seed in range(10):
+        assert run_loopback(seed) is None, seed
+
+def test_view_matches_server_with_magnets():
+    # Pulled food can be eaten by another snake on the same tick
+    for seed in range(30):
+        assert run_loopback(seed, magnet=True) is None, seed
+
+def test_leave_and_join_in_one_tick():
+    for seed in range(10):
+        assert run_loopback(seed, churn=7) is None, seed
+
+def test_spawn_keeps_off_the_powerup():
+    for seed in range(20):
+        arena = Arena(12, 10, seed=seed, mode="EASY")
+        player = arena.add_player("p")
+        for cell in range(arena.cols * arena.rows):
+            if arena.free.slot[cell] >= 0:
+                arena.powerup = ("shield", cell)
+                if arena._spawn(player):
+                    assert cell not in player.snake, (seed, cell)
+                    arena._clear_body(player)
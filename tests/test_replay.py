@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snake_agent import Autopilot
+from snake_replay import OP_RESIZE, Recorder, Recording, ReplayError, verify
+from snake_sim import SnakeSim
+
+def record_game(seed, mode, ticks=3000):
+    # An autopilot game with the board resized now and then, as a window
+    # resize would; returns the recording, the finished sim and whether a
+    # powerup was picked up
+    rng = random.Random(seed)
+    sim = SnakeSim(40, 30, seed, mode)
+    recorder = Recorder(sim)
+    pilot = Autopilot()
+    powerups = False
+    while sim.alive and sim.ticks < ticks:
+        if rng.random() < 0.004:
+            if not sim.resize(rng.randint(32, 56), rng.randint(24, 40)):
+                break
+            recorder.resized(sim)
+        sim.turn(pilot.decide(sim))
+        recorder.before_step(sim)
+        powerups |= "powerup" in sim.step()
+    return recorder.finish(sim), sim, powerups
+
+def test_round_trip():
+    powerups = resizes = 0
+    for seed in range(8):
+        recording, played, got = record_game(seed, ("EASY", "MEDIUM", "HARD")[seed % 3])
+        decoded = Recording.decode(recording.encode())
+        assert (decoded.mode, decoded.seed, decoded.cols, decoded.rows, decoded.events,
+                decoded.score, decoded.ticks) == (recording.mode, recording.seed, recording.cols,
+                                                  recording.rows, recording.events, recording.score,
+                                                  recording.ticks), seed
+        ok, sim = verify(decoded)
+        assert ok, (seed, recording.score, recording.ticks, sim.score, sim.ticks)
+        assert (list(sim.snake), sim.food, sim.active, sim.hurdles) == (
+            list(played.snake), played.food, played.active, played.hurdles), seed
+        powerups += got
+        resizes += any(op == OP_RESIZE for _, op, _ in recording.events)
+    # Otherwise the timed powerups and resizes would go untested
+    assert powerups and resizes
+
+def test_other_layouts_are_refused():
+    recording = Recording("HARD", 1, 40, 30, map_version=255)
+    with pytest.raises(ReplayError, match="hurdle layouts"):
+        Recording.decode(recording.encode())